@@ -0,0 +1,169 @@
+"""
+Calibration of the near-duplicate threshold (NEAR_DUP_JACCARD) on labelled headline pairs.
+
+Each pair is either the same event from two outlets (dup) or two different
+stories that share most of their words — recurring daily items such as market
+moves, AQI readings and match reports (distinct). For every threshold the
+sweep counts how many distinct pairs the MinHash index would suppress (false
+duplicates) and how many real duplicates it would let through (missed).
+Pairs where either headline is below minhash.MIN_TOKENS get no signature and
+are never called duplicates.
+
+The "covered" column runs each pair end to end: the first headline is posted
+into a fresh database the way post_one_tweet records it (source keys + story
+fingerprint), then orchestrator._already_covered is asked about the second —
+the same check news_batch and trend_window make before calling the LLM.
+
+    python benchmarks/dedupe_bench.py
+    python benchmarks/dedupe_bench.py --json out.json
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import db, minhash  # noqa: E402
+from src.config import CONFIG  # noqa: E402
+from src.orchestrator import _already_covered  # noqa: E402
+from src.utils import mkhash, source_keys  # noqa: E402
+
+DUP, DISTINCT = True, False
+
+PAIRS = [
+    # same event, different outlets
+    (DUP, "Earthquake of magnitude 5.2 hits Assam, tremors felt in Guwahati - NDTV",
+          "5.2 magnitude earthquake jolts Assam, tremors felt in Guwahati - The Hindu"),
+    (DUP, "India beat Australia by 5 wickets in first ODI, Kohli hits century - ESPNcricinfo",
+          "Kohli century helps India beat Australia by 5 wickets in first ODI - Times of India"),
+    (DUP, "RBI keeps repo rate unchanged at 6.5% for eighth straight time - Mint",
+          "RBI keeps repo rate unchanged at 6.5 per cent for eighth time in a row - Business Standard"),
+    (DUP, "Heavy rain lashes Mumbai, local trains delayed, schools shut - Hindustan Times",
+          "Mumbai rains: local trains delayed, schools shut as heavy rain lashes city - NDTV"),
+    (DUP, "ISRO successfully launches PSLV-C58 with XPoSat from Sriharikota - The Hindu",
+          "PSLV-C58 with XPoSat successfully launched from Sriharikota by ISRO - India Today"),
+    (DUP, "Supreme Court refuses to stay new criminal laws, seeks Centre's response - LiveLaw",
+          "Supreme Court refuses stay on new criminal laws, seeks response from Centre - Bar and Bench"),
+    (DUP, "Apple launches iPhone 16 with new camera button and A18 chip - The Verge",
+          "iPhone 16 launched with A18 chip and new camera button by Apple - Gadgets 360"),
+    (DUP, "Fire breaks out at Delhi hospital, 7 newborns dead - NDTV",
+          "7 newborns dead as fire breaks out at Delhi children's hospital - Indian Express"),
+    (DUP, "Gold price hits record high of Rs 75,000 per 10 grams - Mint",
+          "Gold hits record high, price crosses Rs 75,000 per 10 grams - Economic Times"),
+    (DUP, "Government extends free ration scheme PMGKAY for five more years - PIB",
+          "Free ration scheme PMGKAY extended for five more years by government - Zee News"),
+    (DUP, "दिल्ली में भारी बारिश, कई इलाकों में जलभराव, ट्रैफिक जाम - आज तक",
+          "दिल्ली में भारी बारिश से कई इलाकों में जलभराव और ट्रैफिक जाम - ABP News"),
+    (DUP, "मुंबई में लोकल ट्रेन सेवा बाधित, यात्री परेशान, भारी बारिश का असर - NDTV India",
+          "भारी बारिश का असर: मुंबई में लोकल ट्रेन सेवा बाधित, यात्री परेशान - Amar Ujala"),
+    (DUP, "Chandrayaan-3 lander Vikram successfully lands on Moon's south pole - ANI",
+          "Vikram lander of Chandrayaan-3 successfully lands near Moon south pole - PTI"),
+    (DUP, "Budget 2024: no change in income tax slabs, standard deduction raised - NDTV",
+          "Budget 2024: no change in income tax slabs, standard deduction raised - The Times of India"),
+    (DUP, "Sensex crashes 1000 points as global markets tumble, IT stocks lead fall - Moneycontrol",
+          "Sensex tumbles 1000 points, IT stocks lead fall amid global markets crash - ET Markets"),
+    # different stories, mostly the same words
+    (DISTINCT, "India beat Australia by 5 wickets in first ODI",
+               "India lose to Australia by 5 wickets in second ODI"),
+    (DISTINCT, "Sensex rises 500 points as banking stocks rally",
+               "Sensex falls 500 points as banking stocks slump"),
+    (DISTINCT, "Delhi AQI 350, air quality very poor", "Delhi AQI 450, air quality severe"),
+    (DISTINCT, "Earthquake of magnitude 5.2 hits Assam", "Earthquake of magnitude 5.2 hits Nepal"),
+    (DISTINCT, "IND vs AUS - 2nd ODI live score", "IND vs AUS - 3rd ODI live score"),
+    (DISTINCT, "IND vs AUS - 2nd ODI", "IND vs AUS - 3rd ODI"),
+    (DISTINCT, "Petrol diesel price today: rates unchanged in Delhi, Mumbai",
+               "Petrol diesel price today: rates cut in Delhi, Mumbai"),
+    (DISTINCT, "Gold price today: gold rises Rs 200 in Delhi", "Gold price today: gold falls Rs 300 in Delhi"),
+    (DISTINCT, "Weather update: heavy rain alert for Kerala, Karnataka today",
+               "Weather update: heatwave alert for Rajasthan, Gujarat today"),
+    (DISTINCT, "RBI keeps repo rate unchanged at 6.5%", "RBI cuts repo rate by 25 basis points to 6.25%"),
+    (DISTINCT, "Mumbai Indians beat Chennai Super Kings by 6 wickets in IPL 2024",
+               "Chennai Super Kings beat Mumbai Indians by 20 runs in IPL 2024"),
+    (DISTINCT, "दिल्ली में आज AQI 350, हवा बेहद खराब", "दिल्ली में आज AQI 420, हवा गंभीर श्रेणी में"),
+    (DISTINCT, "सेंसेक्स 500 अंक चढ़ा, निफ्टी में भी तेजी", "सेंसेक्स 700 अंक गिरा, निफ्टी में भी गिरावट"),
+    (DISTINCT, "Fire breaks out at Delhi hospital, no casualties", "Fire breaks out at Mumbai factory, no casualties"),
+    (DISTINCT, "Modi to visit Bihar tomorrow, will inaugurate projects worth Rs 12,000 crore",
+               "Modi to visit Odisha tomorrow, will inaugurate projects worth Rs 8,000 crore"),
+    (DISTINCT, "UPSC CSE prelims 2024 result declared, check toppers list",
+               "UPSC CSE mains 2024 result declared, check toppers list"),
+    (DISTINCT, "Bank holidays in June 2024: banks closed for 10 days",
+               "Bank holidays in July 2024: banks closed for 12 days"),
+]
+
+
+def scores():
+    """(label, similarity or None when a headline is too short for a signature, a, b) per pair."""
+    out = []
+    for label, a, b in PAIRS:
+        sa, sb = minhash.signature(a), minhash.signature(b)
+        out.append((label, minhash.similarity(sa, sb) if sa and sb else None, a, b))
+    return out
+
+
+def covered():
+    """_already_covered(second headline) after the first one was posted, per pair."""
+    out = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i, (_, a, b) in enumerate(PAIRS):
+            con = db.connect(os.path.join(tmp, f"{i}.sqlite3"))
+            h = mkhash(a)
+            db.add_fingerprint(con, minhash.signature(a), "posted", h, commit=False)
+            db.mark_posted(con, h, a, "bench", "", None, keys=source_keys(a))
+            out.append(_already_covered(con, b))
+            con.close()
+    return out
+
+
+def sweep(scored, thresholds):
+    rows = []
+    for t in thresholds:
+        flagged = [(label, s) for label, s, _, _ in scored if s is not None and s >= t]
+        rows.append({
+            "threshold": t,
+            "false_duplicates": sum(1 for label, _ in flagged if label is DISTINCT),
+            "missed": sum(1 for label, *_ in scored if label is DUP) - sum(1 for label, _ in flagged if label is DUP),
+        })
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--json", default=None, help="write results to this file")
+    args = ap.parse_args()
+
+    configured = CONFIG["dedupe"]["near_dup_jaccard"]
+    scored = scores()
+    hits = covered()
+    print("label     sim   covered")
+    for (label, s, a, b), hit in sorted(zip(scored, hits), key=lambda r: -1 if r[0][1] is None else r[0][1]):
+        print(f"{'dup     ' if label else 'distinct'}  {'  -  ' if s is None else f'{s:.2f} '} "
+              f"{'yes' if hit else 'no ':>5}{'' if hit == label else ' ✗'}  {a[:48]} | {b[:48]}")
+
+    rows = sweep(scored, [round(0.4 + 0.05 * i, 2) for i in range(11)])
+    n_dup = sum(1 for label, *_ in scored if label is DUP)
+    print(f"\n{len(scored)} pairs ({n_dup} dup, {len(scored) - n_dup} distinct), MIN_TOKENS={minhash.MIN_TOKENS}")
+    for r in rows:
+        mark = "  ← NEAR_DUP_JACCARD" if abs(r["threshold"] - configured) < 1e-9 else ""
+        print(f"  threshold {r['threshold']:.2f}: false duplicates {r['false_duplicates']:>2}  "
+              f"missed duplicates {r['missed']:>2}{mark}")
+    wrong = [(label, a, b) for (label, a, b), hit in zip(PAIRS, hits) if hit != label]
+    print(f"_already_covered: {sum(1 for label, *_ in wrong if label is DISTINCT)} distinct stories suppressed, "
+          f"{sum(1 for label, *_ in wrong if label is DUP)} duplicates let through")
+
+    out = {
+        "configured": configured,
+        "min_tokens": minhash.MIN_TOKENS,
+        "pairs": [{"dup": label, "similarity": s, "covered": hit, "a": a, "b": b}
+                  for (label, s, a, b), hit in zip(scored, hits)],
+        "sweep": rows,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Import-time regression benchmark for `python -m src.run`, per trigger.
+
+For every trigger we start a fresh interpreter with `python -X importtime`,
+resolve the trigger's entry point (exactly what src.run does before calling it)
+and sum the self-time of every imported module. Heavy libraries must stay lazy:
+they are reported, and make the run fail, if they load at startup.
+
+    python benchmarks/import_time.py                 # table + JSON
+    python benchmarks/import_time.py --max-ms 150    # also fail if a trigger is slower
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.run import TRIGGERS  # noqa: E402  (light: run.py imports nothing heavy)
+
+HEAVY = ("groq", "httpx", "tweepy", "PIL", "feedparser", "requests")
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(trigger: str, repeat: int):
+    code = f"from src.run import resolve; resolve({trigger!r})"
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT, capture_output=True, text=True, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"{trigger}: {proc.stderr.strip().splitlines()[-1]}")
+        mods = []
+        for line in proc.stderr.splitlines():
+            m = _LINE.match(line)
+            if m:
+                mods.append((m.group(4), int(m.group(1)), int(m.group(2))))
+        total_us = sum(self_us for _, self_us, _ in mods)
+        if best is None or total_us < best[0]:
+            best = (total_us, mods)
+    total_us, mods = best
+    names = {name for name, _, _ in mods}
+    top = sorted(mods, key=lambda m: m[1], reverse=True)[:5]
+    return {
+        "trigger": trigger,
+        "import_ms": round(total_us / 1000, 1),
+        "modules": len(mods),
+        "heavy_loaded": sorted(h for h in HEAVY if h in names),
+        "top_self_ms": [(name, round(self_us / 1000, 2)) for name, self_us, _ in top],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per trigger, best one is kept")
+    ap.add_argument("--max-ms", type=float, default=None, help="fail if a trigger's startup imports exceed this")
+    ap.add_argument("--json", default=None, help="write results to this file")
+    args = ap.parse_args()
+
+    results = [measure(t, args.repeat) for t in TRIGGERS]
+    failed = False
+    for r in results:
+        bad = r["heavy_loaded"] or (args.max_ms is not None and r["import_ms"] > args.max_ms)
+        failed |= bool(bad)
+        flag = "❌" if bad else "✅"
+        print(f"{flag} {r['trigger']:<15} {r['import_ms']:>7.1f} ms  {r['modules']:>4} modules  heavy={r['heavy_loaded']}")
+
+    out = {"python": sys.version.split()[0], "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    else:
+        print(json.dumps(out, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
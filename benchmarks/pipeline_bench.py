@@ -0,0 +1,352 @@
+"""
+Offline end-to-end benchmark: cache_news → news_batch → trend_window with local fakes.
+
+Nothing leaves the machine and no quota is spent. Pluggable stand-ins replace
+- Groq: llm._CLIENT, a fake chat.completions.create (translation, batch translation, satire lines)
+- GNews / NewsAPI / Google News RSS: http_cache's shared session (JSON + RSS bodies)
+- X: x_clients.get (tweepy v1.1 / v2 lookalikes, so poster.py and ratelimit run for real)
+Each fake has a latency and an error rate. Every scenario runs in a fresh temp dir
+and SQLite DB. The real orchestrator code is measured: wall time, LLM calls per
+posted tweet, time spent in SQLite and in meme render/encode.
+
+    python benchmarks/pipeline_bench.py
+    python benchmarks/pipeline_bench.py --llm-latency-ms 400 --llm-error-rate 0.1 --json before.json
+"""
+import os
+import io
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import CONFIG  # noqa: E402
+from src import db, llm, meme, http_cache, x_clients, orchestrator  # noqa: E402
+from src.utils import get_logger  # noqa: E402
+
+# Latin + Devanagari vocabularies, no safety keywords → random headlines are neither near-duplicates nor sensitive
+_EN = ("budget metro startup cricket monsoon election policy rupee market exports farmers court railway "
+       "airport festival science rocket satellite education exam results hiring tech smartphone traffic "
+       "pollution water power grid highway tourism film music award ministry summit trade deal shares "
+       "ipo bank loan inflation fuel price village city youth sports league coach").split()
+_HI = ("सरकार बाजार किसान मेट्रो बजट चुनाव नीति रुपया अदालत स्टार्टअप क्रिकेट मानसून परीक्षा नतीजे भर्ती "
+       "तकनीक स्मार्टफोन ट्रैफिक प्रदूषण पानी बिजली हाईवे पर्यटन फिल्म संगीत पुरस्कार मंत्रालय सम्मेलन "
+       "व्यापार शेयर बैंक कर्ज महंगाई पेट्रोल कीमत गांव शहर युवा खेल लीग कोच योजना घोषणा").split()
+
+
+# ---------------------------------------------------------------- fakes
+class Faults:
+    """Shared latency / error injection with a seeded RNG (same run → same failures)."""
+
+    def __init__(self, seed: int):
+        self.rnd = random.Random(seed)
+
+    def hit(self, latency_ms: float, error_rate: float, name: str):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        if error_rate and self.rnd.random() < error_rate:
+            raise ConnectionError(f"injected {name} failure")
+
+
+class FakeGroq:
+    """Just enough of groq.Groq for llm.call_groq."""
+
+    def __init__(self, faults: Faults, latency_ms: float, error_rate: float):
+        self.faults, self.latency_ms, self.error_rate = faults, latency_ms, error_rate
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def _hindi(seed: str, words: int) -> str:
+        rnd = random.Random(seed)
+        return " ".join(rnd.choice(_HI) for _ in range(words))
+
+    def create(self, model, messages, temperature=None, max_tokens=None, **kwargs):
+        self.calls += 1
+        self.faults.hit(self.latency_ms, self.error_rate, "groq")
+        system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        prompt = messages[-1]["content"]
+        if "numbered lines" in system:  # translate_many
+            n = int(system.split("You get ")[1].split()[0])
+            text = "\n".join(f"{i}. {self._hindi(prompt + str(i), 8)}" for i in range(1, n + 1))
+        elif "translator" in system:  # translate_to_hindi
+            text = self._hindi(prompt, 8)
+        else:  # satire post: title + 3 lines
+            seed = f"{prompt}{kwargs.get('seed', '')}"
+            lines = [f"📰 Satire News ({self._hindi(seed, 2)})"]
+            lines += [self._hindi(seed + str(i), 9) for i in range(3)]
+            text = "\n".join(lines)
+        choice = SimpleNamespace(message=SimpleNamespace(content=text))
+        return SimpleNamespace(choices=[choice], seed=kwargs.get("seed"))
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, status: int = 200):
+        self.content, self.status_code, self.headers = body, status, {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            import requests
+            raise requests.HTTPError(f"{self.status_code}")
+
+
+class FakeNewsSession:
+    """Stands in for http_cache.session(): GNews/NewsAPI JSON and Google News RSS."""
+
+    def __init__(self, faults: Faults, latency_ms: float, error_rate: float, items: int, seed: int):
+        self.faults, self.latency_ms, self.error_rate = faults, latency_ms, error_rate
+        self.items, self.seed = items, seed
+        self.requests = 0
+
+    def _headlines(self, source: str, lang=_EN):
+        rnd = random.Random(f"{self.seed}:{source}")
+        return [(" ".join(rnd.choice(lang) for _ in range(9)).capitalize(), f"https://{source}.example/{i}")
+                for i in range(self.items)]
+
+    def get(self, url, headers=None, timeout=None):
+        import requests
+        self.requests += 1
+        try:
+            self.faults.hit(self.latency_ms, self.error_rate, "news")
+        except ConnectionError as e:
+            raise requests.ConnectionError(str(e))
+        if "gnews.io" in url:
+            arts = [{"title": t, "description": f"{t} — details", "url": u} for t, u in self._headlines("gnews")]
+            return FakeResponse(json.dumps({"articles": arts}).encode())
+        if "newsapi.org" in url:
+            arts = [{"title": t, "description": f"{t}.", "url": u} for t, u in self._headlines("newsapi")]
+            return FakeResponse(json.dumps({"status": "ok", "articles": arts}).encode())
+        entries = "".join(f"<item><title>{t} - समाचार</title><link>{u}</link></item>"
+                          for t, u in self._headlines("rss", _HI))
+        return FakeResponse(f'<?xml version="1.0"?><rss version="2.0"><channel>{entries}</channel></rss>'
+                            .encode("utf-8"))
+
+
+class FakeX:
+    """tweepy.API / tweepy.Client lookalike; counts posts and uploaded bytes."""
+
+    def __init__(self, faults: Faults, latency_ms: float, error_rate: float):
+        self.faults, self.latency_ms, self.error_rate = faults, latency_ms, error_rate
+        self.posts = 0
+        self.upload_bytes = 0
+
+    def _post(self):
+        self.faults.hit(self.latency_ms, self.error_rate, "x")
+        self.posts += 1
+        return str(10 ** 18 + self.posts)
+
+    def create_tweet(self, text):
+        return SimpleNamespace(data={"id": self._post()})
+
+    def media_upload(self, filename, file=None, **kwargs):
+        self.faults.hit(self.latency_ms, self.error_rate, "x-upload")
+        if file is not None:
+            self.upload_bytes += len(file.getvalue())
+        else:
+            self.upload_bytes += os.path.getsize(filename)
+        return SimpleNamespace(media_id_string="1")
+
+    def update_status(self, status, media_ids=None):
+        return SimpleNamespace(id=self._post())
+
+
+# ---------------------------------------------------------------- probes
+PROBE = {"db_ms": 0.0, "db_statements": 0, "meme_ms": 0.0, "memes": 0}
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that adds the time of every statement/commit to PROBE."""
+
+    def _timed(self, fn, *args):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            PROBE["db_ms"] += (time.perf_counter() - t0) * 1000
+            PROBE["db_statements"] += 1
+
+    def execute(self, *args):
+        return self._timed(super().execute, *args)
+
+    def executemany(self, *args):
+        return self._timed(super().executemany, *args)
+
+    def executescript(self, *args):
+        return self._timed(super().executescript, *args)
+
+    def commit(self):
+        return self._timed(super().commit)
+
+
+def _install_probes():
+    real_connect = sqlite3.connect
+    sqlite3.connect = lambda *a, **k: real_connect(*a, factory=TimedConnection, **k)
+
+    for name in ("_render", "encode_media"):
+        fn = getattr(meme, name)
+
+        def timed(*args, _fn=fn, _name=name, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return _fn(*args, **kwargs)
+            finally:
+                PROBE["meme_ms"] += (time.perf_counter() - t0) * 1000
+                PROBE["memes"] += _name == "_render"
+        setattr(meme, name, timed)
+
+
+# ---------------------------------------------------------------- scenarios
+def _fresh(args, workdir: str):
+    """New DB + fakes; drop every per-process handle that points at the previous scenario."""
+    os.chdir(workdir)
+    faults = Faults(args.seed)
+    CONFIG["db"]["path"] = os.path.join(workdir, "bench.sqlite3")
+    CONFIG["testing"]["test_mode"] = False
+    CONFIG["http"]["enabled"] = False  # measure fetch + parse, not the disk cache
+    CONFIG["news"].update(gnews_key="bench", newsapi_key="bench", sources=["gnews", "newsapi", "google_rss"])
+    CONFIG["news"]["gnews_limit"] = CONFIG["news"]["newsapi_limit"] = args.items
+    CONFIG["news"]["google_rss_limit"] = args.items
+    CONFIG["posting"]["use_memes"] = True
+    CONFIG["posting"]["meme_template"] = os.path.join(ROOT, "assets", "templates", "meme1.jpg")
+    CONFIG["limits"].update(daily=10 ** 6, monthly=10 ** 6, burst=10 ** 6)
+    CONFIG["llm"]["groq_api_key"] = CONFIG["llm"]["groq_api_key"] or "bench"  # enables translate-on-cache
+    CONFIG["llm"]["candidates"] = args.candidates
+    CONFIG["pipeline"]["enabled"] = args.pipeline
+
+    groq = FakeGroq(faults, args.llm_latency_ms, args.llm_error_rate)
+    news = FakeNewsSession(faults, args.http_latency_ms, args.http_error_rate, args.items, args.seed)
+    x = FakeX(faults, args.x_latency_ms, args.x_error_rate)
+    db.close_shared()  # LLM cache / rate-limit connection of the previous scenario
+    llm._CLIENT = groq
+    for k in llm.CACHE_STATS:
+        llm.CACHE_STATS[k] = 0
+    http_cache._SESSION = news
+    x_clients.get = lambda kind: x
+    return groq, news, x
+
+
+def _measure(fn, groq, news, x) -> dict:
+    for k in PROBE:
+        PROBE[k] = 0
+    calls0, req0, posts0 = groq.calls, news.requests, x.posts
+    t0 = time.perf_counter()
+    fn()
+    wall = (time.perf_counter() - t0) * 1000
+    posted = x.posts - posts0
+    llm_calls = groq.calls - calls0
+    return {
+        "wall_ms": round(wall, 1),
+        "llm_calls": llm_calls,
+        "posted": posted,
+        "llm_calls_per_post": round(llm_calls / posted, 2) if posted else None,
+        "http_requests": news.requests - req0,
+        "db_ms": round(PROBE["db_ms"], 1),
+        "db_statements": PROBE["db_statements"],
+        "meme_ms": round(PROBE["meme_ms"], 1),
+        "memes": PROBE["memes"],
+        "upload_kb": round(x.upload_bytes / 1024, 1),
+    }
+
+
+def scenario_cache_news(args, workdir):
+    fakes = _fresh(args, workdir)
+    return _measure(orchestrator.cache_news_batch, *fakes)
+
+
+def scenario_news_batch(args, workdir):
+    fakes = _fresh(args, workdir)
+    orchestrator.cache_news_batch()  # setup, not measured
+    return _measure(lambda: orchestrator.run_news_post_batch(args.posts), *fakes)
+
+
+def scenario_trend_window(args, workdir):
+    fakes = _fresh(args, workdir)
+
+    CONFIG["posting"]["trends_per_window"] = args.posts  # one window, --posts trend tweets
+    return _measure(orchestrator.run_trend_window, *fakes)
+
+
+SCENARIOS = {
+    "cache_news": scenario_cache_news,
+    "news_batch": scenario_news_batch,
+    "trend_window": scenario_trend_window,
+}
+
+
+def _git(*cmd) -> str:
+    try:
+        return subprocess.run(["git", *cmd], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _median_run(results: list) -> dict:
+    """Per-metric median over repeats (None-safe)."""
+    out = {}
+    for key in results[0]:
+        vals = [r[key] for r in results if r[key] is not None]
+        out[key] = round(statistics.median(vals), 2) if vals else None
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per scenario, median reported")
+    ap.add_argument("--items", type=int, default=20, help="headlines per fake source")
+    ap.add_argument("--posts", type=int, default=3, help="tweets per news_batch / trend_window runs")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--candidates", type=int, default=1, help="LLM_CANDIDATES (generations per tweet)")
+    ap.add_argument("--pipeline", action="store_true", help="PIPELINE=true (asyncio stage pipeline)")
+    for name, lat in (("llm", 200), ("http", 80), ("x", 150)):
+        ap.add_argument(f"--{name}-latency-ms", type=float, default=lat)
+        ap.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+    ap.add_argument("--verbose", action="store_true", help="keep the bot's own log/print output")
+    ap.add_argument("--json", default=None, help="write results to this file")
+    args = ap.parse_args()
+
+    _install_probes()
+    if not args.verbose:
+        get_logger().setLevel("ERROR")
+
+    results = {}
+    for name in args.scenarios.split(","):
+        runs = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as workdir:
+                quiet = contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext()
+                with quiet:
+                    runs.append(SCENARIOS[name](args, workdir))
+                os.chdir(ROOT)
+        results[name] = _median_run(runs)
+        r = results[name]
+        print(f"{name:<13} wall {r['wall_ms']:>8.1f} ms  posted {r['posted']:>3}  "
+              f"LLM calls/post {r['llm_calls_per_post']}  db {r['db_ms']:.1f} ms ({r['db_statements']} stmts)  "
+              f"meme {r['meme_ms']:.1f} ms ({r['memes']})", file=sys.stderr)
+
+    params = {k: v for k, v in vars(args).items() if k not in ("json", "verbose")}
+    out = {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": sys.version.split()[0],
+        "params": params,
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    else:
+        print(json.dumps(out, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Throughput of the text-safety checks (is_sensitive / sensitive_categories / detox).
+
+Compares the compiled single-pass engine (src/safety.py) with the old approach
+(one re.search per category pattern, one re.sub per slur) on a fixed corpus of
+tweet-sized texts, at the built-in list size and with synthetic extra terms to
+show how each scales as the keyword lists grow.
+
+    python benchmarks/safety_bench.py
+    python benchmarks/safety_bench.py --extra 0,1000,5000 --json out.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import unicodedata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src import safety  # noqa: E402
+
+_FILLER = ("सरकार ने आज नई योजना की घोषणा की लोग खुश हैं बाजार में तेजी "
+           "cricket match india wins big traffic jam delhi metro news update").split()
+
+
+def corpus(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    terms = [t for ts in safety.KEYWORDS.values() for t in ts]
+    out = []
+    for _ in range(n):
+        words = [rnd.choice(_FILLER) for _ in range(rnd.randint(15, 35))]
+        if rnd.random() < 0.3:  # ~30% of texts contain a keyword
+            words.insert(rnd.randrange(len(words)), rnd.choice(terms))
+        out.append(" ".join(words))
+    return out
+
+
+def synthetic_terms(n: int, seed: int = 11):
+    rnd = random.Random(seed)
+    letters = "कखगघचछजझटठडढतथदधनपफबभमयरलवसह"
+    return [" ".join("".join(rnd.choice(letters) for _ in range(rnd.randint(3, 7)))
+                     for _ in range(rnd.randint(1, 2))) for _ in range(n)]
+
+
+def legacy(keywords):
+    """The pre-engine implementation: per-category alternations, per-slur re.sub."""
+    cats = [r"|".join(rf"\b{re.escape(t)}\b".replace(r"\ ", r"\s") for t in terms)
+            for c, terms in keywords.items() if c != safety.SLURS and terms]
+    slurs = [rf"\b{re.escape(t)}\b" for t in keywords.get(safety.SLURS, [])]
+
+    def is_sensitive(text):
+        t = unicodedata.normalize("NFKC", text)
+        return any(re.search(p, t, flags=re.IGNORECASE) for p in cats)
+
+    def detox(text):
+        for p in slurs:
+            text = re.sub(p, safety.DETOX_PLACEHOLDER, text, flags=re.IGNORECASE)
+        return text
+
+    return is_sensitive, detox
+
+
+def rate(fn, texts, min_s: float) -> float:
+    n, t0 = 0, time.perf_counter()
+    while True:
+        for t in texts:
+            fn(t)
+        n += len(texts)
+        dt = time.perf_counter() - t0
+        if dt >= min_s:
+            return n / dt
+
+
+def run(extra: int, texts, min_s: float):
+    keywords = {c: list(t) for c, t in safety.KEYWORDS.items()}
+    keywords.setdefault("extra", []).extend(synthetic_terms(extra))
+    old_sens, old_detox = legacy(keywords)
+
+    t0 = time.perf_counter()
+    engine_sens, engine_slurs = safety._split(keywords)
+    compile_ms = (time.perf_counter() - t0) * 1000
+
+    mismatches = sum(old_sens(t) != bool(engine_sens.pattern.search(t)) for t in texts)
+    return {
+        "terms": sum(len(t) for t in keywords.values()),
+        "compile_ms": round(compile_ms, 1),
+        "legacy_is_sensitive_per_s": round(rate(old_sens, texts, min_s)),
+        "engine_is_sensitive_per_s": round(rate(lambda t: engine_sens.pattern.search(t), texts, min_s)),
+        "engine_categories_per_s": round(rate(lambda t: list(engine_sens.hits(t)), texts, min_s)),
+        "legacy_detox_per_s": round(rate(old_detox, texts, min_s)),
+        "engine_detox_per_s": round(rate(lambda t: engine_slurs.pattern.sub(safety.DETOX_PLACEHOLDER, t),
+                                         texts, min_s)),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--texts", type=int, default=500, help="corpus size")
+    ap.add_argument("--extra", default="0,1000,5000", help="synthetic extra terms per run, comma-separated")
+    ap.add_argument("--min-seconds", type=float, default=0.5, help="time spent per measurement")
+    ap.add_argument("--json", default=None, help="write results to this file")
+    args = ap.parse_args()
+
+    texts = corpus(args.texts)
+    results = []
+    for extra in (int(x) for x in args.extra.split(",")):
+        r = run(extra, texts, args.min_seconds)
+        results.append(r)
+        speedup = r["engine_is_sensitive_per_s"] / max(1, r["legacy_is_sensitive_per_s"])
+        print(f"{r['terms']:>6} terms  is_sensitive: legacy {r['legacy_is_sensitive_per_s']:>8}/s  "
+              f"engine {r['engine_is_sensitive_per_s']:>8}/s (×{speedup:.1f})  "
+              f"detox: legacy {r['legacy_detox_per_s']:>8}/s  engine {r['engine_detox_per_s']:>8}/s  "
+              f"compile {r['compile_ms']} ms  mismatches={r['mismatches']}")
+
+    out = {"python": sys.version.split()[0], "texts": len(texts), "results": results}
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+    else:
+        print(json.dumps(out, indent=2))
+    sys.exit(1 if any(r["mismatches"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,13 +15,25 @@ CONFIG = {
         "access_token": os.getenv("X_ACCESS_TOKEN"),
         "access_secret": os.getenv("X_ACCESS_SECRET"),
         "woeid": os.getenv("WOEID", "23424848"),
+        "account": os.getenv("X_ACCOUNT", "default"),  # quota ledger key
     },
     "llm": {
         "groq_api_key": os.getenv("GROQ_API_KEY"),
         "hf_token": os.getenv("HUGGINGFACEHUB_API_TOKEN"),
         "model": os.getenv("LLM_MODEL", "llama-3.1-8b-instant"),
-        "temperature": float(os.getenv("LLM_TEMPERATURE", "0.8")),
-        "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "512")),
+        "temperature": float(os.getenv("LLM_TEMPERATURE", "0.7")),
+        "max_tokens": int(os.getenv("LLM_MAX_TOKENS", "200")),
+        "timeout": float(os.getenv("LLM_TIMEOUT", "30")),
+        "pool_size": int(os.getenv("LLM_POOL_SIZE", "8")),
+        "keepalive_seconds": float(os.getenv("LLM_KEEPALIVE_SECONDS", "120")),
+        "translate_batch": int(os.getenv("LLM_TRANSLATE_BATCH", "10")),
+        # >1: generate that many posts concurrently (different seeds) and keep the best-scoring one
+        "candidates": int(os.getenv("LLM_CANDIDATES", "1")),
+        "cache_enabled": env_bool("LLM_CACHE", True),
+        "cache_ttl_hours": int(os.getenv("LLM_CACHE_TTL_HOURS", "168")),
+        "cache_max_rows": int(os.getenv("LLM_CACHE_MAX_ROWS", "5000")),
+        # calls at or below this temperature are treated as deterministic and cached by default
+        "cache_max_temperature": float(os.getenv("LLM_CACHE_MAX_TEMPERATURE", "0.5")),
     },
     "news": {
         "country": os.getenv("DEFAULT_COUNTRY", "in"),
@@ -29,27 +41,87 @@ CONFIG = {
         "newsapi_key": os.getenv("NEWSAPI_KEY"),
         "gnews_limit": int(os.getenv("GNEWS_LIMIT", "20")),
         "newsapi_limit": int(os.getenv("NEWSAPI_LIMIT", "20")),
+        "google_rss_url": os.getenv("GOOGLE_RSS_URL", "https://news.google.com/rss?hl=hi-IN&gl=IN&ceid=IN:hi"),
+        "google_rss_limit": int(os.getenv("GOOGLE_RSS_LIMIT", "20")),
+        "x_trends_limit": int(os.getenv("X_TRENDS_LIMIT", "5")),
+        # fetched concurrently by cache_news; x_trends needs Elevated X access
+        "sources": [s.strip() for s in os.getenv("NEWS_SOURCES", "gnews,newsapi,google_rss").split(",") if s.strip()],
+        "fetch_deadline": float(os.getenv("FETCH_DEADLINE", "15")),
+        "lease_seconds": int(os.getenv("NEWS_LEASE_SECONDS", "600")),
+        "translate_on_cache": env_bool("TRANSLATE_ON_CACHE", True),
+    },
+    "http": {
+        "enabled": env_bool("HTTP_CACHE", True),
+        "cache_dir": os.getenv("HTTP_CACHE_DIR", ".http_cache"),
+        # seconds a cached response is served without any request (per source)
+        "ttl": {
+            "gnews": int(os.getenv("HTTP_TTL_GNEWS", "1800")),
+            "newsapi": int(os.getenv("HTTP_TTL_NEWSAPI", "1800")),
+            "google_rss": int(os.getenv("HTTP_TTL_GOOGLE_RSS", "300")),
+        },
     },
     "posting": {
         "use_memes": env_bool("USE_MEMES", True),
         "meme_template": os.getenv("MEME_TEMPLATE", "assets/templates/meme1.jpg"),
         "trends_per_window": int(os.getenv("TRENDS_PER_WINDOW", "1")),
+        "news_batch_count": int(os.getenv("NEWS_BATCH_COUNT", "1")),  # tweets per news_batch run
+        "meme_workers": int(os.getenv("MEME_WORKERS", "0")),   # batch render processes (0 = CPU count)
+    },
+    "media": {
+        "max_bytes": int(os.getenv("MEDIA_MAX_BYTES", "400000")),    # upload budget per meme
+        "formats": [f.strip().lower() for f in os.getenv("MEDIA_FORMATS", "jpeg,webp").split(",") if f.strip()],
+        "quality_min": int(os.getenv("MEDIA_QUALITY_MIN", "40")),
+        "quality_max": int(os.getenv("MEDIA_QUALITY_MAX", "90")),
+    },
+    "drafts": {
+        "target": int(os.getenv("DRAFTS_TARGET", "3")),        # ready drafts to keep in stock
+        "max_age_hours": int(os.getenv("DRAFT_MAX_AGE_HOURS", "12")),
+        "memes": env_bool("DRAFT_MEMES", False),               # also pre-render memes (needs USE_MEMES)
+        "max_attempts": int(os.getenv("POST_MAX_ATTEMPTS", "3")),  # failed X calls before a story is dropped
     },
     "hashtags": {
         "enabled": env_bool("HASHTAGS_ENABLED", True),
         "max_count": int(os.getenv("HASHTAGS_MAX", "2")),
         "disable_on_sensitive": env_bool("DISABLE_HASHTAGS_ON_SENSITIVE", True),
     },
+    "dedupe": {
+        "near_dup_days": int(os.getenv("NEAR_DUP_DAYS", "3")),
+        "near_dup_jaccard": float(os.getenv("NEAR_DUP_JACCARD", "0.7")),
+    },
     "limits": {
         "daily": int(os.getenv("DAILY_TWEET_LIMIT", "15")),
         "monthly": int(os.getenv("MONTHLY_TWEET_LIMIT", "450")),
+        "burst": int(os.getenv("POST_BURST", "5")),                  # token bucket size (posts back-to-back)
+        "max_wait": float(os.getenv("RATE_LIMIT_MAX_WAIT", "120")),  # sleep to a reset this close, else defer
     },
     "safety": {
         "avoid_sensitive_humor": env_bool("AVOID_SENSITIVE_HUMOR", True),
         "critique_authorities": env_bool("CRITIQUE_AUTHORITIES", True),  # respectful accountability
+        "keywords_file": os.getenv("SAFETY_KEYWORDS_FILE", ""),  # extra JSON {category: [terms]} lists
+    },
+    "daemon": {
+        # seconds between runs of each job in TRIGGER=daemon (0 = disabled)
+        "cache_every": float(os.getenv("DAEMON_CACHE_EVERY", "10800")),
+        "drafts_every": float(os.getenv("DAEMON_DRAFTS_EVERY", "3600")),
+        "trend_every": float(os.getenv("DAEMON_TREND_EVERY", "14400")),
+        "news_every": float(os.getenv("DAEMON_NEWS_EVERY", "7200")),
+        "jitter": float(os.getenv("DAEMON_JITTER", "120")),
+    },
+    "pipeline": {
+        # asyncio pipeline for news_batch (NEWS_BATCH_COUNT > 1) and trend_window (TRENDS_PER_WINDOW > 1)
+        "enabled": env_bool("PIPELINE", False),
+        "queue_size": int(os.getenv("PIPELINE_QUEUE_SIZE", "4")),              # per stage queue
+        "generate_workers": int(os.getenv("PIPELINE_GENERATE_WORKERS", "4")),  # concurrent LLM/meme jobs
     },
     "logging": {
-        "file": os.getenv("LOG_FILE", "bot.log"),
+        "file": os.getenv("LOG_FILE", "bot.log"),                  # JSON lines ("" = console only)
+        "level": os.getenv("LOG_LEVEL", "INFO").upper(),           # DEBUG adds tweet/translation previews
+        "max_bytes": int(os.getenv("LOG_MAX_BYTES", str(5 * 1024 * 1024))),
+        "backups": int(os.getenv("LOG_BACKUPS", "3")),
+    },
+    "metrics": {
+        "file": os.getenv("METRICS_FILE", "metrics.jsonl"),      # one JSON line per run ("" = off)
+        "prom_file": os.getenv("METRICS_PROM_FILE", ""),         # Prometheus textfile, e.g. /var/lib/node_exporter/bot.prom
     },
     "db": {
         "path": os.getenv("DB_PATH", "bot.sqlite3")
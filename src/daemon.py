@@ -0,0 +1,110 @@
+"""
+Long-running scheduler (TRIGGER=daemon) for self-hosting.
+
+One process runs cache_news / prepare_drafts / trend_window / news_batch on
+intervals, so imports, the pooled Groq/HTTP clients and the caches stay warm
+between jobs. Jobs are jittered and never overlap (they share SQLite and the
+posting quota). SIGTERM / Ctrl+C lets the running job finish, then exits.
+"""
+import asyncio
+import random
+import signal
+import time
+from datetime import datetime, timezone
+
+from .config import CONFIG
+from .db import connect
+from .utils import get_logger
+from . import metrics, orchestrator, ratelimit
+
+log = get_logger()
+
+# Jobs that spend posting quota get stretched when the month is running hot
+_POSTING_JOBS = ("trend_window", "news_batch")
+
+
+def _jobs():
+    d = CONFIG["daemon"]
+    return {
+        "cache_news": (orchestrator.cache_news_batch, d["cache_every"]),
+        "prepare_drafts": (orchestrator.prepare_drafts, d["drafts_every"]),
+        "trend_window": (orchestrator.run_trend_window, d["trend_every"]),
+        "news_batch": (orchestrator.run_news_post_batch, d["news_every"]),
+    }
+
+
+def _paced(every: float) -> float:
+    """Post less often if the monthly cap would be hit before month end; never before the next free slot."""
+    con = connect(CONFIG["db"]["path"], account=CONFIG["x"]["account"])
+    try:
+        st = orchestrator.quota_status(con, datetime.now(timezone.utc))
+    finally:
+        con.close()
+    if st["monthly_cap_hit_day"] and st["projected_month_total"] > st["monthly_cap"]:
+        factor = st["projected_month_total"] / max(1, st["monthly_cap"])
+        log.info(f"🐢 Monthly cap projected on day {st['monthly_cap_hit_day']} — interval ×{factor:.2f}")
+        every *= factor
+    wait, reason = ratelimit.next_slot()
+    if wait > every:  # nothing can go out before then anyway
+        log.info(f"⏳ {reason} — next posting run in {wait:.0f}s")
+        return wait
+    return every
+
+
+def _run_job(name: str, func):
+    with metrics.run(name):
+        func()
+
+
+async def _job_loop(name: str, func, every: float, lock: asyncio.Lock, stop: asyncio.Event):
+    jitter = CONFIG["daemon"]["jitter"]
+    delay = random.uniform(0, jitter)  # don't fire every job at t=0
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+            return  # stop requested while sleeping
+        except asyncio.TimeoutError:
+            pass
+
+        async with lock:
+            if stop.is_set():
+                return
+            log.info(f"▶ daemon job: {name}")
+            t0 = time.monotonic()
+            try:
+                await asyncio.to_thread(_run_job, name, func)
+            except Exception as e:
+                log.error(f"❌ daemon job {name} failed: {e}")
+            log.info(f"⏱ {name} done in {time.monotonic() - t0:.2f}s")
+
+        delay = every
+        if name in _POSTING_JOBS:
+            try:
+                delay = await asyncio.to_thread(_paced, every)
+            except Exception as e:  # e.g. "database is locked" — keep the job loop alive
+                log.warning(f"⚠ Pacing check for {name} failed ({e}) — next run in {every:.0f}s")
+        delay = max(1.0, delay + random.uniform(-jitter, jitter))
+
+
+async def run_daemon_async():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+
+    lock = asyncio.Lock()
+    jobs = {n: (f, every) for n, (f, every) in _jobs().items() if every > 0}
+    log.info(f"🟢 Daemon started: {', '.join(f'{n}/{int(e)}s' for n, (_, e) in jobs.items())}")
+    tasks = [asyncio.create_task(_job_loop(n, f, every, lock, stop)) for n, (f, every) in jobs.items()]
+
+    await stop.wait()
+    log.info("🛑 Shutdown requested — waiting for the running job to finish…")
+    await asyncio.gather(*tasks)
+    log.info("👋 Daemon stopped.")
+
+
+def run_daemon():
+    asyncio.run(run_daemon_async())
@@ -1,5 +1,9 @@
 import sqlite3
-from datetime import datetime
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from . import minhash
 
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS posts (
@@ -23,34 +27,491 @@ CREATE TABLE IF NOT EXISTS cache_items (
   created_at TEXT
 );
 
+CREATE TABLE IF NOT EXISTS seen_keys (
+  key TEXT PRIMARY KEY,
+  post_hash TEXT,
+  created_at TEXT
+) WITHOUT ROWID;
+
+-- Finished, validated tweets generated ahead of the posting job
+CREATE TABLE IF NOT EXISTS drafts (
+  id INTEGER PRIMARY KEY,
+  item_hash TEXT UNIQUE,
+  text TEXT,
+  title TEXT,
+  url TEXT,
+  source TEXT,
+  media_path TEXT,
+  media_hash TEXT,
+  status TEXT NOT NULL DEFAULT 'ready',
+  created_at TEXT,
+  updated_at TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_drafts_status ON drafts(status, id);
+
+-- Posting quota ledger: rolling counters per UTC day ('d:YYYY-MM-DD') and month ('m:YYYY-MM'),
+-- per account and per post type ('*' = all types)
+CREATE TABLE IF NOT EXISTS quota_counters (
+  period TEXT,
+  account TEXT,
+  post_type TEXT,
+  count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (period, account, post_type)
+) WITHOUT ROWID;
+
+-- Last X rate-limit headers per endpoint + the local posting token bucket (key 'bucket');
+-- times are unix seconds so the scheduler can compare them with time.time()
+CREATE TABLE IF NOT EXISTS rate_limits (
+  account TEXT,
+  key TEXT,
+  lim REAL,
+  remaining REAL,
+  reset_at REAL,
+  updated_at REAL,
+  PRIMARY KEY (account, key)
+) WITHOUT ROWID;
+
+-- MinHash signatures of cached/posted stories + their LSH band keys
+CREATE TABLE IF NOT EXISTS story_fps (
+  id INTEGER PRIMARY KEY,
+  sig BLOB,
+  kind TEXT,
+  ref TEXT,
+  created_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS story_bands (
+  band INTEGER,
+  fp_id INTEGER,
+  PRIMARY KEY (band, fp_id)
+) WITHOUT ROWID;
+
+-- Content-addressed Groq responses (key = hash of model/prompts/sampling params)
+CREATE TABLE IF NOT EXISTS llm_cache (
+  key TEXT PRIMARY KEY,
+  response TEXT,
+  created_at TEXT,
+  last_used TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_cache_used ON llm_cache(last_used);
 CREATE INDEX IF NOT EXISTS idx_posts_hash ON posts(hash);
 CREATE INDEX IF NOT EXISTS idx_cache_hash ON cache_items(hash);
 """
 
-def connect(db_path: str):
-    con = sqlite3.connect(db_path)
+# Columns added after the first release; old DBs get them via ALTER TABLE.
+_CACHE_ITEM_COLUMNS = {
+    "status": "TEXT NOT NULL DEFAULT 'pending'",
+    "lease_until": "TEXT",
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "updated_at": "TEXT",
+    "text_hi": "TEXT",  # Hindi translation of "title — desc", filled at cache time
+}
+_DRAFT_COLUMNS = {
+    "attempts": "INTEGER NOT NULL DEFAULT 0",  # failed X calls for this tweet
+}
+
+DEFAULT_ACCOUNT = "default"
+
+# Queue lifecycle of a cached news item
+STATUS_PENDING = "pending"
+STATUS_DRAFTING = "drafting"
+STATUS_POSTED = "posted"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+STATUS_DRAFTED = "drafted"  # tweet text sits in `drafts`, waiting for news_batch
+
+# Draft lifecycle
+DRAFT_READY = "ready"
+DRAFT_POSTING = "posting"
+
+
+def _add_columns(con, table: str, columns: dict):
+    have = {row[1] for row in con.execute(f"PRAGMA table_info({table})")}
+    for col, decl in columns.items():
+        if col not in have:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+
+def _migrate(con, account: str):
+    _add_columns(con, "cache_items", _CACHE_ITEM_COLUMNS)
+    _add_columns(con, "drafts", _DRAFT_COLUMNS)
+    con.execute("CREATE INDEX IF NOT EXISTS idx_cache_status ON cache_items(status, id)")
+    _backfill_quota(con, account)
+    con.commit()
+
+def _backfill_quota(con, account: str):
+    """Seed the ledger once from existing posts (DBs created before quota_counters existed), under `account`."""
+    if con.execute("SELECT 1 FROM quota_counters LIMIT 1").fetchone():
+        return
+    for prefix, width in (("d:", 10), ("m:", 7)):
+        con.execute(
+            f"""
+            INSERT INTO quota_counters(period, account, post_type, count)
+            SELECT '{prefix}' || substr(posted_at, 1, {width}), ?, post_type, COUNT(*) FROM (
+                SELECT posted_at, '*' AS post_type FROM posts
+                UNION ALL SELECT posted_at, COALESCE(source, '') FROM posts
+            ) WHERE posted_at IS NOT NULL GROUP BY 1, 3
+            """,
+            (account,)
+        )
+
+def connect(db_path: str, check_same_thread: bool = True, account: str = DEFAULT_ACCOUNT):
+    """Open the DB, creating/migrating it; `account` owns the posts of a pre-ledger DB (X_ACCOUNT)."""
+    con = sqlite3.connect(db_path, check_same_thread=check_same_thread)
     con.execute("PRAGMA journal_mode=WAL;")
     con.executescript(SCHEMA)
+    _migrate(con, account)
     return con
 
+_SHARED = {}
+_SHARED_LOCK = threading.RLock()
+
+
+@contextmanager
+def shared(db_path: str, account: str = DEFAULT_ACCOUNT):
+    """
+    Process-wide connection to `db_path` for code that runs on any thread (LLM cache,
+    the X response hook). Opened on first use; callers take turns for the `with` block.
+    """
+    with _SHARED_LOCK:
+        con = _SHARED.get(db_path)
+        if con is None:
+            con = _SHARED[db_path] = connect(db_path, check_same_thread=False, account=account)
+        yield con
+
+
+def close_shared():
+    """Close the shared connections (tests, benchmarks switching DB files)."""
+    with _SHARED_LOCK:
+        for con in _SHARED.values():
+            con.close()
+        _SHARED.clear()
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
 def seen_hash(con, h: str) -> bool:
     cur = con.execute("SELECT 1 FROM posts WHERE hash=?", (h,))
     return cur.fetchone() is not None
 
-def mark_posted(con, h: str, text: str, source: str, url: str, media_hash: str, external_id: str=None):
-    con.execute(
-        "INSERT OR IGNORE INTO posts(hash, text, source, url, media_hash, posted_at, external_id) VALUES(?,?,?,?,?,?,?)",
-        (h, text, source, url, media_hash, datetime.utcnow().isoformat(), external_id)
-    )
+def seen_source(con, keys, days: int = None) -> bool:
+    """True if any canonical source key (url / title / item hash) was posted (in the last `days` days)."""
+    keys = list(keys or [])
+    if not keys:
+        return False
+    marks = ",".join("?" * len(keys))
+    if days is None:
+        cur = con.execute(f"SELECT 1 FROM seen_keys WHERE key IN ({marks}) LIMIT 1", keys)
+    else:
+        since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        cur = con.execute(f"SELECT 1 FROM seen_keys WHERE key IN ({marks}) AND created_at >= ? LIMIT 1",
+                          (*keys, since))
+    return cur.fetchone() is not None
+
+def quota_periods(now: datetime = None):
+    """Ledger keys for the current UTC day and month."""
+    now = now or datetime.utcnow()
+    return f"d:{now:%Y-%m-%d}", f"m:{now:%Y-%m}"
+
+def _insert_posts(con, rows, account: str):
+    """rows = [(hash, text, source, url, media_hash, external_id, keys), ...] — caller commits.
+    New posts bump the quota ledger in the same transaction. Returns how many posts were new."""
+    now = _now()
+    day, month = quota_periods()
+    new = 0
+    for h, text, source, url, media_hash, external_id, keys in rows:
+        cur = con.execute(
+            "INSERT OR IGNORE INTO posts(hash, text, source, url, media_hash, posted_at, external_id) VALUES(?,?,?,?,?,?,?)",
+            (h, text, source, url, media_hash, now, external_id)
+        )
+        if cur.rowcount != 1:
+            continue
+        new += 1
+        con.executemany(
+            """
+            INSERT INTO quota_counters(period, account, post_type, count) VALUES(?,?,?,1)
+            ON CONFLICT(period, account, post_type) DO UPDATE SET count = count + 1
+            """,
+            [(p, account, t) for p in (day, month) for t in ("*", source or "")]
+        )
+        if keys:
+            con.executemany(
+                "INSERT INTO seen_keys(key, post_hash, created_at) VALUES(?,?,?) "
+                "ON CONFLICT(key) DO UPDATE SET post_hash=excluded.post_hash, created_at=excluded.created_at",
+                [(k, h, now) for k in keys]
+            )
+    return new
+
+def mark_posted(con, h: str, text: str, source: str, url: str, media_hash: str, external_id: str=None, keys=None,
+                account: str = DEFAULT_ACCOUNT):
+    _insert_posts(con, [(h, text, source, url, media_hash, external_id, keys)], account)
     con.commit()
 
-def cache_item(con, h: str, title: str, desc: str, url: str, source: str):
-    con.execute(
+def mark_posted_bulk(con, rows, account: str = DEFAULT_ACCOUNT) -> int:
+    """
+    Record many posted tweets in ONE transaction (one WAL fsync).
+    rows = [(hash, text, source, url, media_hash, external_id, keys), ...]; returns new posts.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    with con:
+        return _insert_posts(con, rows, account)
+
+def quota_usage(con, account: str = DEFAULT_ACCOUNT, post_type: str = "*", now: datetime = None):
+    """(posts today, posts this month) from the ledger — primary-key lookups, no scan of posts."""
+    day, month = quota_periods(now)
+    got = dict(con.execute(
+        "SELECT period, count FROM quota_counters WHERE period IN (?,?) AND account=? AND post_type=?",
+        (day, month, account, post_type)
+    ).fetchall())
+    return got.get(day, 0), got.get(month, 0)
+
+def add_fingerprint(con, sig, kind: str, ref: str, commit: bool = True):
+    """Index a story signature (kind = 'cached' | 'posted')."""
+    if not sig:
+        return
+    _insert_fingerprint(con, sig, kind, ref, _now())
+    if commit:
+        con.commit()
+
+def _insert_fingerprint(con, sig, kind: str, ref: str, now: str):
+    cur = con.execute(
+        "INSERT INTO story_fps(sig, kind, ref, created_at) VALUES(?,?,?,?)",
+        (minhash.pack(sig), kind, ref, now)
+    )
+    con.executemany(
+        "INSERT OR IGNORE INTO story_bands(band, fp_id) VALUES(?,?)",
+        [(b, cur.lastrowid) for b in minhash.band_keys(sig)]
+    )
+
+def near_duplicate(con, sig, days: int, threshold: float, kinds=("posted",)) -> bool:
+    """Was a story with Jaccard >= threshold seen in the last `days` days?"""
+    if not sig:
+        return False
+    bands = minhash.band_keys(sig)
+    since = (datetime.utcnow() - timedelta(days=days)).isoformat()
+    cur = con.execute(
+        f"""
+        SELECT DISTINCT f.sig FROM story_bands b JOIN story_fps f ON f.id = b.fp_id
+        WHERE b.band IN ({",".join("?" * len(bands))})
+          AND f.created_at >= ? AND f.kind IN ({",".join("?" * len(kinds))})
+        """,
+        (*bands, since, *kinds)
+    )
+    return any(minhash.similarity(sig, minhash.unpack(blob)) >= threshold for (blob,) in cur)
+
+def cache_item(con, h: str, title: str, desc: str, url: str, source: str) -> bool:
+    """Returns True if the item was new."""
+    cur = con.execute(
         "INSERT OR IGNORE INTO cache_items(hash, title, desc, url, source, created_at) VALUES(?,?,?,?,?,?)",
-        (h, title, desc, url, source, datetime.utcnow().isoformat())
+        (h, title, desc, url, source, _now())
     )
     con.commit()
+    return cur.rowcount == 1
+
+def cache_items_bulk(con, rows, sigs=None):
+    """
+    Insert many cache items with one executemany in ONE transaction.
+    rows = [(hash, title, desc, url, source), ...]; sigs = {hash: minhash signature} (optional,
+    indexed as 'cached' for the rows that turn out to be new).
+    Returns (new, duplicates).
+    """
+    rows = list(rows)
+    if not rows:
+        return 0, 0
+    now = _now()
+    with con:
+        hashes = list({r[0] for r in rows})
+        existing = set()
+        for i in range(0, len(hashes), 500):  # stay under SQLite's bound-parameter limit
+            chunk = hashes[i:i + 500]
+            cur = con.execute(
+                f"SELECT hash FROM cache_items WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            existing.update(h for (h,) in cur)
+        before = con.total_changes
+        con.executemany(
+            "INSERT OR IGNORE INTO cache_items(hash, title, desc, url, source, created_at) VALUES(?,?,?,?,?,?)",
+            [(h, title, desc, url, source, now) for h, title, desc, url, source in rows]
+        )
+        new = con.total_changes - before
+        added = set()
+        for h, *_ in rows:
+            if h in existing or h in added:
+                continue
+            added.add(h)
+            if sigs and sigs.get(h):
+                _insert_fingerprint(con, sigs[h], "cached", h, now)
+    return new, len(rows) - new
 
 def select_uncached(con, limit=50):
-    cur = con.execute("SELECT hash, title, desc, url, source FROM cache_items ORDER BY id DESC LIMIT ?", (limit,))
+    """Newest items that have never been handed out (status = pending)."""
+    cur = con.execute(
+        "SELECT hash, title, desc, url, source FROM cache_items WHERE status=? ORDER BY id DESC LIMIT ?",
+        (STATUS_PENDING, limit)
+    )
+    return cur.fetchall()
+
+def claim_next_pending(con, lease_seconds: int = 600):
+    """
+    Atomically lease the newest pending item (or one whose drafting lease expired).
+    Returns (hash, title, desc, url, source, text_hi) or None when the queue is empty.
+    The item stays in 'drafting' until finish_item() or release_item() is called;
+    if the process dies, the lease runs out and the item becomes claimable again.
+    """
+    now = _now()
+    until = (datetime.utcnow() + timedelta(seconds=lease_seconds)).isoformat()
+    with con:
+        # both lookups are served by idx_cache_status(status, id)
+        row = con.execute(
+            "SELECT id FROM cache_items WHERE status=? ORDER BY id DESC LIMIT 1",
+            (STATUS_PENDING,)
+        ).fetchone()
+        if row is None:
+            row = con.execute(
+                "SELECT id FROM cache_items WHERE status=? AND lease_until < ? ORDER BY id DESC LIMIT 1",
+                (STATUS_DRAFTING, now)
+            ).fetchone()
+        if row is None:
+            return None
+        cur = con.execute(
+            """
+            UPDATE cache_items SET status=?, lease_until=?, attempts=attempts+1, updated_at=?
+            WHERE id=? AND (status=? OR (status=? AND lease_until < ?))
+            """,
+            (STATUS_DRAFTING, until, now, row[0], STATUS_PENDING, STATUS_DRAFTING, now)
+        )
+        if cur.rowcount != 1:
+            return None  # another worker won the race
+        return con.execute(
+            "SELECT hash, title, desc, url, source, text_hi FROM cache_items WHERE id=?", (row[0],)
+        ).fetchone()
+
+def select_untranslated(con, limit=50):
+    """Pending items that have no stored Hindi translation yet (newest first)."""
+    cur = con.execute(
+        "SELECT hash, title, desc FROM cache_items WHERE status=? AND text_hi IS NULL ORDER BY id DESC LIMIT ?",
+        (STATUS_PENDING, limit)
+    )
     return cur.fetchall()
+
+def set_translations(con, pairs):
+    """pairs = [(hash, text_hi), ...] — one transaction."""
+    con.executemany(
+        "UPDATE cache_items SET text_hi=?, updated_at=? WHERE hash=?",
+        [(text_hi, _now(), h) for h, text_hi in pairs]
+    )
+    con.commit()
+
+def finish_item(con, h: str, status: str):
+    """Move a leased item to a terminal state (posted / skipped / failed)."""
+    con.execute(
+        "UPDATE cache_items SET status=?, lease_until=NULL, updated_at=? WHERE hash=?",
+        (status, _now(), h)
+    )
+    con.commit()
+
+def release_item(con, h: str):
+    """Give a leased item back to the queue untouched (e.g. posting limit hit)."""
+    con.execute(
+        "UPDATE cache_items SET status=?, lease_until=NULL, updated_at=? WHERE hash=? AND status=?",
+        (STATUS_PENDING, _now(), h, STATUS_DRAFTING)
+    )
+    con.commit()
+
+def llm_cache_get(con, key: str, ttl_seconds: int):
+    """Cached response for `key` if younger than the TTL, else None."""
+    since = (datetime.utcnow() - timedelta(seconds=ttl_seconds)).isoformat()
+    row = con.execute(
+        "SELECT response FROM llm_cache WHERE key=? AND created_at >= ?", (key, since)
+    ).fetchone()
+    if row is None:
+        return None
+    con.execute("UPDATE llm_cache SET last_used=? WHERE key=?", (_now(), key))
+    con.commit()
+    return row[0]
+
+def llm_cache_put(con, key: str, response: str, max_rows: int):
+    """Store a response; evict least-recently-used rows beyond `max_rows`."""
+    now = _now()
+    con.execute(
+        "INSERT OR REPLACE INTO llm_cache(key, response, created_at, last_used) VALUES(?,?,?,?)",
+        (key, response, now, now)
+    )
+    con.execute(
+        "DELETE FROM llm_cache WHERE key IN "
+        "(SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+        (max_rows,)
+    )
+    con.commit()
+
+def add_draft(con, item_hash: str, text: str, title: str, url: str, source: str,
+              media_path: str = None, media_hash: str = None, attempts: int = 0):
+    now = _now()
+    con.execute(
+        "INSERT OR REPLACE INTO drafts(item_hash, text, title, url, source, media_path, media_hash, status, attempts, "
+        "created_at, updated_at) VALUES(?,?,?,?,?,?,?,?,?,?,?)",
+        (item_hash, text, title, url, source, media_path, media_hash, DRAFT_READY, attempts, now, now)
+    )
+    con.commit()
+
+def count_ready_drafts(con, max_age_hours: int) -> int:
+    since = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat()
+    cur = con.execute("SELECT COUNT(*) FROM drafts WHERE status=? AND created_at >= ?", (DRAFT_READY, since))
+    return cur.fetchone()[0]
+
+def pop_ready_draft(con, max_age_hours: int):
+    """
+    Take the newest ready draft younger than `max_age_hours` and flag it 'posting'.
+    Returns (id, item_hash, text, title, url, source, media_path, media_hash) or None.
+    """
+    since = (datetime.utcnow() - timedelta(hours=max_age_hours)).isoformat()
+    with con:
+        row = con.execute(
+            "SELECT id, item_hash, text, title, url, source, media_path, media_hash FROM drafts "
+            "WHERE status=? AND created_at >= ? ORDER BY id DESC LIMIT 1",
+            (DRAFT_READY, since)
+        ).fetchone()
+        if row is None:
+            return None
+        cur = con.execute(
+            "UPDATE drafts SET status=?, updated_at=? WHERE id=? AND status=?",
+            (DRAFT_POSTING, _now(), row[0], DRAFT_READY)
+        )
+        return row if cur.rowcount == 1 else None
+
+def finish_draft(con, draft_id: int, status: str):
+    con.execute("UPDATE drafts SET status=?, updated_at=? WHERE id=?", (status, _now(), draft_id))
+    con.commit()
+
+def retry_draft(con, draft_id: int, max_attempts: int) -> bool:
+    """Count a failed post: back to 'ready' (True) until it has failed `max_attempts` times, then 'failed'."""
+    con.execute(
+        "UPDATE drafts SET attempts=attempts+1, status=CASE WHEN attempts+1 >= ? THEN ? ELSE ? END, updated_at=? "
+        "WHERE id=?",
+        (max_attempts, STATUS_FAILED, DRAFT_READY, _now(), draft_id)
+    )
+    con.commit()
+    return con.execute("SELECT status FROM drafts WHERE id=?", (draft_id,)).fetchone()[0] == DRAFT_READY
+
+def rate_limit_put(con, account: str, key: str, lim, remaining, reset_at, updated_at):
+    con.execute(
+        "INSERT INTO rate_limits(account, key, lim, remaining, reset_at, updated_at) VALUES (?,?,?,?,?,?) "
+        "ON CONFLICT(account, key) DO UPDATE SET lim=excluded.lim, remaining=excluded.remaining, "
+        "reset_at=excluded.reset_at, updated_at=excluded.updated_at",
+        (account, key, lim, remaining, reset_at, updated_at)
+    )
+    con.commit()
+
+def rate_limit_all(con, account: str) -> dict:
+    """{key: (lim, remaining, reset_at, updated_at)} for one account."""
+    cur = con.execute(
+        "SELECT key, lim, remaining, reset_at, updated_at FROM rate_limits WHERE account=?", (account,)
+    )
+    return {row[0]: tuple(row[1:]) for row in cur.fetchall()}
+
+def queue_counts(con) -> dict:
+    cur = con.execute("SELECT status, COUNT(*) FROM cache_items GROUP BY status")
+    return dict(cur.fetchall())
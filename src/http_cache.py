@@ -0,0 +1,146 @@
+"""
+Shared HTTP layer for the news sources.
+
+- One pooled requests.Session (keep-alive) for every source
+- On-disk response cache with a freshness TTL per source: inside the TTL we
+  don't touch the network (and don't burn GNews/NewsAPI quota)
+- After the TTL we revalidate with If-None-Match / If-Modified-Since; a 304
+  re-serves the cached body
+"""
+import os
+import json
+import time
+import threading
+
+from . import metrics
+from .config import CONFIG
+from .utils import mkhash, get_logger
+
+log = get_logger()
+
+# Sources whose every request counts against a daily API quota
+QUOTA_SOURCES = ("gnews", "newsapi")
+
+_SESSION = None
+_LOCK = threading.Lock()
+STATS = {
+    "requests": 0,              # real network requests sent
+    "fresh_hits": 0,            # served from disk, no request at all
+    "revalidated": 0,           # 304 Not Modified
+    "stale_on_error": 0,        # network failed, served the old copy
+    "bytes_downloaded": 0,
+    "bytes_saved": 0,
+    "quota_calls_avoided": 0,
+}
+
+
+def session():
+    """Shared requests.Session."""
+    global _SESSION
+    if _SESSION is None:
+        with _LOCK:
+            if _SESSION is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+                s.mount("https://", adapter)
+                s.mount("http://", adapter)
+                _SESSION = s
+    return _SESSION
+
+
+def _paths(url: str):
+    # URLs carry API keys → only their hash goes to disk
+    base = os.path.join(CONFIG["http"]["cache_dir"], mkhash(url))
+    return base + ".json", base + ".body"
+
+
+def _load(url: str):
+    meta_path, body_path = _paths(url)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(body_path, "rb") as f:
+            return meta, f.read()
+    except (OSError, ValueError):
+        return None, None
+
+
+def _write(path: str, data: bytes):
+    tmp = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _store(url: str, meta: dict, body: bytes = None):
+    meta_path, body_path = _paths(url)
+    os.makedirs(CONFIG["http"]["cache_dir"], exist_ok=True)
+    if body is not None:
+        _write(body_path, body)
+    _write(meta_path, json.dumps(meta).encode("utf-8"))
+
+
+def _bump(key: str, n: int = 1):
+    with _LOCK:
+        STATS[key] += n
+    metrics.count(f"http.{key}", n)
+
+
+def get(url: str, source: str, timeout: float = 20) -> bytes:
+    """GET `url` through the cache; `source` selects the freshness TTL (HTTP_TTL_<SOURCE>)."""
+    import requests
+    ttl = CONFIG["http"]["ttl"].get(source, 0)
+    meta, body = _load(url) if CONFIG["http"]["enabled"] else (None, None)
+    now = time.time()
+
+    if body is not None and now - meta.get("fetched_at", 0) < ttl:
+        _bump("fresh_hits")
+        _bump("bytes_saved", len(body))
+        if source in QUOTA_SOURCES:
+            _bump("quota_calls_avoided")
+        return body
+
+    headers = {}
+    if body is not None:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        _bump("requests")
+        r = session().get(url, headers=headers, timeout=timeout)
+        if r.status_code == 304 and body is not None:
+            _bump("revalidated")
+            _bump("bytes_saved", len(body))
+            meta["fetched_at"] = now
+            _store(url, meta)
+            return body
+        r.raise_for_status()
+    except requests.RequestException as e:
+        if body is None:
+            raise
+        log.warning(f"⚠ {source}: {e} — serving cached copy")
+        _bump("stale_on_error")
+        return body
+
+    _bump("bytes_downloaded", len(r.content))
+    if CONFIG["http"]["enabled"]:
+        _store(url, {
+            "source": source,
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "fetched_at": now,
+        }, r.content)
+    return r.content
+
+
+def get_json(url: str, source: str, timeout: float = 20):
+    return json.loads(get(url, source, timeout))
+
+
+def http_stats() -> dict:
+    with _LOCK:
+        return dict(STATS)
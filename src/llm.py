@@ -13,10 +13,19 @@
 # - Keeps translation, detox, sensitivity logic intact
 
 
+from . import metrics
 from .config import CONFIG
-from .utils import safe_tweet, hashtagify, detox, is_sensitive
+from .db import shared, llm_cache_get, llm_cache_put
+from .utils import safe_tweet, hashtagify, detox, is_sensitive, mkhash, get_logger
 import re
-from groq import Groq
+import random
+import logging
+import sqlite3
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+log = get_logger()
 
 
 # ---------------------- ENHANCED STYLE PROMPTS (Concrete + Meaningful) -------------------------
@@ -119,67 +128,228 @@ def normalize_numbers(text: str) -> str:
 
 
 # ---------------------- GROQ CALLER (Groq 0.11.0 Compatible) -------------------------
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
 def _groq_client():
     """
-    ✅ Groq 0.11.0 Compatible Client
+    ✅ Groq 0.11.0 Compatible Client — built ONCE per process and reused.
+    - Keep-alive pool: later calls skip the TCP + TLS handshake
     - No 'proxies' parameter (removed in 0.11.0)
     - Use environment variables for proxy if needed:
       export HTTP_PROXY=http://proxy:8080
       export HTTPS_PROXY=https://proxy:8080
     """
-    return Groq(api_key=CONFIG["llm"]["groq_api_key"])
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                import httpx
+                from groq import Groq, DefaultHttpxClient
+                cfg = CONFIG["llm"]
+                pool = httpx.Limits(
+                    max_connections=cfg["pool_size"],
+                    max_keepalive_connections=cfg["pool_size"],
+                    keepalive_expiry=cfg["keepalive_seconds"],
+                )
+                _CLIENT = Groq(
+                    api_key=cfg["groq_api_key"],
+                    timeout=cfg["timeout"],
+                    http_client=DefaultHttpxClient(limits=pool),
+                )
+    return _CLIENT
+
+
+# ---------------------- RESPONSE CACHE (SQLite) -------------------------
+CACHE_STATS = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def _cache_db():
+    return shared(CONFIG["db"]["path"], CONFIG["x"]["account"])  # call_groq runs on worker threads too
+
+
+def _cache_key(model: str, system: str, prompt: str, temperature: float, max_tokens: int, seed=None) -> str:
+    parts = (model, system or "", prompt, f"{temperature:.3f}", str(max_tokens))
+    return mkhash(*parts) if seed is None else mkhash(*parts, f"seed={seed}")
+
+
+def _cache_lookup(key: str):
+    ttl = CONFIG["llm"]["cache_ttl_hours"] * 3600
+    try:
+        with _cache_db() as con:
+            hit = llm_cache_get(con, key, ttl)
+    except sqlite3.Error as e:
+        CACHE_STATS["errors"] += 1
+        log.warning(f"⚠ LLM cache read failed: {e}", extra={"event": "llm.cache_error", "op": "read"})
+        return None
+    CACHE_STATS["hits" if hit is not None else "misses"] += 1
+    metrics.count("llm.cache_hits" if hit is not None else "llm.cache_misses")
+    return hit
+
+
+def _cache_store(key: str, response: str):
+    try:
+        with _cache_db() as con:
+            llm_cache_put(con, key, response, CONFIG["llm"]["cache_max_rows"])
+    except sqlite3.Error as e:
+        CACHE_STATS["errors"] += 1
+        log.warning(f"⚠ LLM cache write failed: {e}", extra={"event": "llm.cache_error", "op": "write"})
 
 
-def call_groq(prompt: str, system: str = None, temperature: float = 0.85, max_tokens: int = 300) -> str:
+def llm_cache_stats() -> dict:
+    """Hit/miss counters for this process."""
+    total = CACHE_STATS["hits"] + CACHE_STATS["misses"]
+    return {**CACHE_STATS, "hit_rate": (CACHE_STATS["hits"] / total) if total else 0.0}
+
+
+def call_groq(prompt: str, system: str = None, temperature: float = None, max_tokens: int = None,
+              cache: bool = None, seed: int = None) -> str:
     """
     ✅ Groq 0.11.0 Compatible API Call
+    Model comes from CONFIG["llm"]["model"]; temperature / max_tokens default to CONFIG too.
+    `cache=None` → cache only low-temperature (deterministic) calls; True/False forces it.
+    `seed` asks Groq for a reproducible sample (and is part of the cache key).
+    Empty results (errors) are never cached.
     """
+    model = CONFIG["llm"]["model"]
+    if temperature is None:
+        temperature = CONFIG["llm"]["temperature"]
+    if max_tokens is None:
+        max_tokens = CONFIG["llm"]["max_tokens"]
+    if cache is None:
+        cache = temperature <= CONFIG["llm"]["cache_max_temperature"]
+    cache = cache and CONFIG["llm"]["cache_enabled"]
+
+    key = _cache_key(model, system, prompt, temperature, max_tokens, seed) if cache else None
+    if key:
+        hit = _cache_lookup(key)
+        if hit is not None:
+            return hit
+
     try:
         client = _groq_client()
         msgs = []
         if system:
             msgs.append({"role": "system", "content": system})
         msgs.append({"role": "user", "content": prompt})
-        
-        out = client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=msgs,
-            temperature=temperature,
-            max_tokens=max_tokens
-        )
-        
-        return normalize_numbers(out.choices[0].message.content.strip())
+
+        extra = {"seed": seed} if seed is not None else {}
+
+        metrics.count("llm.calls")
+        with metrics.span("llm"):
+            out = client.chat.completions.create(
+                model=model,
+                messages=msgs,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra
+            )
+        usage = getattr(out, "usage", None)
+        if usage is not None:
+            metrics.count("llm.tokens.prompt", getattr(usage, "prompt_tokens", 0) or 0)
+            metrics.count("llm.tokens.completion", getattr(usage, "completion_tokens", 0) or 0)
+
+        result = normalize_numbers(out.choices[0].message.content.strip())
     except Exception as e:
-        print(f"❌ Groq Error: {e}")
+        metrics.count("llm.errors")
+        log.error(f"❌ Groq Error: {e}", extra={"event": "llm.error", "model": model})
         return ""
 
+    if key and result:
+        _cache_store(key, result)
+    return result
+
 
 # ---------------------- TRANSLATION -------------------------
+_TRANSLATE_SYSTEM = (
+    "You are a Gen-Z Hindi translator. "
+    "Write MOSTLY in Hindi (Devanagari). "
+    "Use natural English words only when needed: " + ", ".join(GEN_Z_WORDS) + ". "
+    "Use English numerals (1, 2, 3)."
+)
+
+
 def translate_to_hindi(text: str) -> str:
     if not text or not text.strip():
         return ""
     if get_hindi_percentage(text) > 80:
         return normalize_numbers(text.strip())
 
-    print(f"🔄 Translating to Hinglish: {text[:60]}...")
-    system = (
-        "You are a Gen-Z Hindi translator. "
-        "Write MOSTLY in Hindi (Devanagari). "
-        "Use natural English words only when needed: " + ", ".join(GEN_Z_WORDS) + ". "
-        "Use English numerals (1, 2, 3). One concise line only."
-    )
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"🔄 Translating to Hinglish: {text[:60]}...", extra={"event": "translate.start", "chars": len(text)})
     prompt = f"{TRANSLATE_TO_HINDI_PROMPT}{text}"
-    result = call_groq(prompt, system, temperature=0.4, max_tokens=120)
+    result = call_groq(prompt, _TRANSLATE_SYSTEM + " One concise line only.", temperature=0.4, max_tokens=120)
     if result and contains_hindi(result):
         pct = get_hindi_percentage(result)
         if pct >= 50:
-            print(f"✅ Translation success ({pct:.0f}% Hindi): {result[:60]}...")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug(f"✅ Translation success ({pct:.0f}% Hindi): {result[:60]}...",
+                          extra={"event": "translate.ok", "hindi_pct": round(pct)})
             return result.strip()
-        print(f"⚠ Low Hindi percentage: {pct:.0f}%")
-    print("❌ Translation failed")
+        log.info(f"⚠ Low Hindi percentage: {pct:.0f}%", extra={"event": "translate.low_hindi", "hindi_pct": round(pct)})
+    log.warning("❌ Translation failed", extra={"event": "translate.failed", "chars": len(text)})
     return text.strip()
 
 
+def _is_good_hindi(text: str) -> bool:
+    return bool(text) and contains_hindi(text) and get_hindi_percentage(text) >= 50
+
+
+def translate_many(texts: list) -> list:
+    """
+    Translate many headlines with ONE Groq request per chunk (numbered lines in, numbered lines out).
+    Each answer is validated like translate_to_hindi; only the entries that fail are retried one by one.
+    A chunk whose answer is not numbered exactly 1..n is not trusted at all: all its entries are retried.
+    Returns a list aligned with `texts` (original text kept where translation failed).
+    """
+    out = [None] * len(texts)
+    todo = []
+    for i, t in enumerate(texts):
+        if not t or not t.strip():
+            out[i] = ""
+        elif get_hindi_percentage(t) > 80:
+            out[i] = normalize_numbers(t.strip())
+        else:
+            todo.append(i)
+
+    size = max(1, CONFIG["llm"]["translate_batch"])
+    for start in range(0, len(todo), size):
+        chunk = todo[start:start + size]
+        log.debug(f"🔄 Batch translating {len(chunk)} headlines in one call...",
+                  extra={"event": "translate.batch", "size": len(chunk)})
+        numbered = "\n".join(f"{n}. {' '.join(texts[i].split())}" for n, i in enumerate(chunk, 1))
+        system = (
+            _TRANSLATE_SYSTEM + f" You get {len(chunk)} numbered lines. Translate each one separately and "
+            f"answer with exactly {len(chunk)} lines in the same order, each starting with its number "
+            "and a dot (1. ...). Nothing else."
+        )
+        result = call_groq(f"{TRANSLATE_TO_HINDI_PROMPT}{numbered}", system,
+                           temperature=0.4, max_tokens=min(4000, 120 * len(chunk)))
+        answers = []
+        for line in (result or "").splitlines():
+            m = re.match(r"^\s*(\d+)\s*[.)।:-]\s*(.+)$", line)
+            if m:
+                answers.append((int(m.group(1)), m.group(2).strip()))
+        # a merged, skipped or renumbered line would pair a translation with the wrong story
+        if [n for n, _ in answers] != list(range(1, len(chunk) + 1)):
+            log.warning(f"⚠ Batch translation returned {len(answers)} numbered lines for {len(chunk)} headlines "
+                        "— not trusting this chunk",
+                        extra={"event": "translate.batch_misaligned", "size": len(chunk), "lines": len(answers)})
+            continue
+        for (_, answer), i in zip(answers, chunk):
+            if _is_good_hindi(answer):
+                out[i] = answer
+
+    failed = [i for i in todo if out[i] is None]
+    if failed:
+        log.info(f"⚠ {len(failed)}/{len(todo)} batch translations invalid → retrying individually",
+                 extra={"event": "translate.batch_retry", "failed": len(failed), "total": len(todo)})
+    for i in failed:
+        out[i] = translate_to_hindi(texts[i])
+    return out
+
+
 # ---------------------- UTILITIES FOR MULTI-LINE -------------------------
 def _clean_lines(text: str) -> str:
     lines = [ln.strip() for ln in text.replace("\r", "").split("\n")]
@@ -229,7 +399,7 @@ def _enforce_line_count(text: str, min_lines: int = 3, max_lines: int = 4) -> st
 
 
 # ---------------------- IMPROVED MULTI-LINE POST GENERATION -------------------------
-def generate_multiline_post(core: str, mode: str) -> str:
+def generate_multiline_post(core: str, mode: str, budget: int = 270) -> str:
     """
     ✅ Satire-style post generator.
     Format:
@@ -238,6 +408,8 @@ def generate_multiline_post(core: str, mode: str) -> str:
     Line 2: Public reaction / sarcasm
     Line 3: Relatable punchline or exaggeration
     (No quotes in any line)
+    With LLM_CANDIDATES > 1 several posts are generated concurrently and the best
+    score_candidate() wins; `budget` is the room (chars) left for the body in the final tweet.
     """
     system = (
         "You are a savage Gen-Z Hindi satire writer. Generate a short satirical post in Hinglish (Hindi + English)."
@@ -260,44 +432,103 @@ def generate_multiline_post(core: str, mode: str) -> str:
 
     user_prompt = f"Topic: {core}\nWrite in this exact format. Avoid using quotation marks."
 
-    out = call_groq(user_prompt, system, temperature=0.7, max_tokens=200)
-    if not out:
-        return core
+    # creative call (LLM_TEMPERATURE): not cached, so a retry gets a fresh post instead of a replayed bad one
+    n = max(1, CONFIG["llm"]["candidates"])
+    if n == 1:
+        outs = [call_groq(user_prompt, system)]  # LLM_TEMPERATURE / LLM_MAX_TOKENS
+    else:
+        outs = _generate_candidates(user_prompt, system, n)
 
-    # Clean lines
-    text = _clean_lines(out)
-    
+    candidates = [_postprocess(out) for out in outs if out]
+    if not candidates:
+        return core
+    if len(candidates) == 1:
+        return candidates[0][0]
+
+    scored = sorted(((score_candidate(text, raw, budget, core), text) for text, raw in candidates), reverse=True)
+    metrics.count("llm.candidates", len(candidates))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"🏆 Best of {len(candidates)} candidates: score {scored[0][0]:.2f} "
+                  f"(worst {scored[-1][0]:.2f})",
+                  extra={"event": "generate.candidates", "scores": [round(sc, 3) for sc, _ in scored]})
+    return scored[0][1]
+
+
+def _generate_candidates(prompt: str, system: str, n: int) -> list:
+    """n concurrent generations with distinct seeds — wall time ≈ one LLM latency (shared keep-alive pool)."""
+    base = random.randrange(2 ** 31)  # fresh per call: a retry gets a new candidate set
+    with ThreadPoolExecutor(max_workers=n, thread_name_prefix="gen") as ex:
+        futures = [ex.submit(contextvars.copy_context().run, call_groq, prompt, system, seed=base + i)
+                   for i in range(n)]
+        return [f.result() for f in futures]
+
+
+def _postprocess(out: str):
+    """(cleaned post, raw cleaned text before detox) for one model answer."""
+    raw = _clean_lines(out)
     # ✅ Remove any remaining single/double quotes if model still adds them
-    text = text.replace("'", "").replace('"', '')
+    raw = raw.replace("'", "").replace('"', '')
 
-    text = normalize_numbers(detox(text))  # clean abusive/toxic words
+    text = normalize_numbers(detox(raw))  # clean abusive/toxic words
 
     # Limit to max 4 lines (1 title + 3 content lines)
     lines = [l for l in text.split("\n") if l.strip()]
     if len(lines) > 4:
         lines = lines[:4]
 
-    return "\n".join(lines)
+    return "\n".join(lines), raw
+
+
+# Weights of score_candidate's parts (each part is 0..1)
+_SCORE_WEIGHTS = {"length": 0.35, "hindi": 0.25, "lines": 0.2, "emoji": 0.1, "safety": 0.1}
+
+
+def score_candidate(text: str, raw: str, budget: int, core: str = "") -> float:
+    """
+    Local quality score of a generated post (higher is better, max 1.0):
+    fits `budget` chars without safe_tweet cutting it (short posts lose a little), mostly Hindi,
+    title + 3 lines, at most 2 emojis, no slurs removed by detox and no sensitive terms the topic didn't have.
+    """
+    size = len(text)
+    if size > budget:
+        length = max(0.0, 1 - 4 * (size - budget) / budget)  # would be truncated mid-line
+    else:
+        length = min(1.0, size / (0.5 * budget))
+    hindi = get_hindi_percentage(text) / 100
+    lines = max(0.0, 1 - 0.35 * abs(len(text.split("\n")) - 4))
+    emoji = 1.0 if _emoji_count(text) <= 2 else 0.5
+    safety = 1.0
+    if detox(raw) != raw:
+        safety -= 0.6
+    if is_sensitive(text) and not is_sensitive(core):
+        safety -= 0.4
+    parts = {"length": length, "hindi": hindi, "lines": lines, "emoji": emoji, "safety": max(0.0, safety)}
+    return sum(_SCORE_WEIGHTS[k] * v for k, v in parts.items())
 
 # ---------------------- MAIN TWEET FUNCTION -------------------------
 def make_tweet(
     topic: str,
     link: str = None,
     mode: str = "funny",
-    add_hashtags_from: str = None
+    add_hashtags_from: str = None,
+    core_hi: str = None
 ) -> str:
-    """Generate a meaningful multi-line Gen-Z Hinglish tweet (3–4 lines)."""
+    """
+    Generate a meaningful multi-line Gen-Z Hinglish tweet (3–4 lines).
+    `core_hi` is an already-translated topic (e.g. stored by cache_news); it skips step 1.
+    """
 
     if not topic or not topic.strip():
         return "⚠ अरे भाई, विषय तो दे दो! 😅"
 
-    print(f"\n{'='*60}")
-    print(f"🐦 Making tweet for: {topic[:60]}...")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"🐦 Making tweet for: {topic[:60]}...", extra={"event": "tweet.start", "mode": mode})
 
-    # 1) Translate topic to Hindi
-    core = translate_to_hindi(topic)
+    # 1) Translate topic to Hindi (unless done ahead of time)
+    with metrics.span("translate"):
+        core = core_hi if _is_good_hindi(core_hi) else translate_to_hindi(topic)
     if not contains_hindi(core):
-        print("⚠ Translation weak, using original as core")
+        log.info("⚠ Translation weak, using original as core", extra={"event": "tweet.weak_translation"})
         core = topic.strip()
 
     # 2) Sensitivity check
@@ -305,8 +536,10 @@ def make_tweet(
     if sensitive and mode == "funny":
         mode = "accountability" if CONFIG["safety"].get("critique_authorities") else "serious"
 
-    # 3) Generate body
-    body = generate_multiline_post(core, mode)
+    # 3) Generate body (budget: 280 minus quotes, link line and room for hashtags)
+    budget = 278 - (len(link) + 3 if link else 0) - (30 if add_hashtags_from and not sensitive else 0)
+    with metrics.span("generate"):
+        body = generate_multiline_post(core, mode, budget=max(80, budget))
 
     # 4) Wrap in quotes
     body_wrapped = body.strip()
@@ -323,30 +556,38 @@ def make_tweet(
     # 6) Optional hashtags
     tags = ""
     if add_hashtags_from and not sensitive:
-        print(f"🔖 Generating hashtags from: {add_hashtags_from[:50]}...")
-        hindi_src = translate_to_hindi(add_hashtags_from)
-        if contains_hindi(hindi_src):
-            tags = hashtagify(
-                hindi_src,
-                max_count=CONFIG.get("hashtags", {}).get("max_count", 3)
-            )
-            if tags:
-                print(f"✅ Hashtags: {tags}")
+        with metrics.span("hashtag"):
+            tags = _hashtags(topic, core, add_hashtags_from)
 
     # 7) Final cleanups
     final_tweet = (final_text + " " + tags).strip()
     final_tweet = normalize_numbers(safe_tweet(final_tweet))
 
-    # 8) Metrics
-    hindi_pct = get_hindi_percentage(final_tweet)
-    preview = final_tweet.replace("\n", "\\n")
-    print(f"✅ Final tweet ({len(final_tweet)} chars, {hindi_pct:.0f}% Hindi, Meaningful Gen-Z ✨):")
-    print(f"   {preview[:250]}...")
-    print(f"{'='*60}\n")
+    # 8) Metrics (the preview is only built when DEBUG logging is on)
+    if log.isEnabledFor(logging.DEBUG):
+        hindi_pct = get_hindi_percentage(final_tweet)
+        preview = final_tweet.replace("\n", "\\n")
+        log.debug(f"✅ Final tweet ({len(final_tweet)} chars, {hindi_pct:.0f}% Hindi): {preview[:250]}",
+                  extra={"event": "tweet.done", "mode": mode, "chars": len(final_tweet),
+                         "hindi_pct": round(hindi_pct), "sensitive": sensitive})
 
     return final_tweet
 
 
+def _hashtags(topic: str, core: str, add_hashtags_from: str) -> str:
+    # same source as the topic → reuse the translation instead of a second Groq call
+    hindi_src = core if add_hashtags_from == topic else translate_to_hindi(add_hashtags_from)
+    if not contains_hindi(hindi_src):
+        return ""
+    tags = hashtagify(
+        hindi_src,
+        max_count=CONFIG.get("hashtags", {}).get("max_count", 3)
+    )
+    if tags:
+        log.debug(f"✅ Hashtags: {tags}", extra={"event": "tweet.hashtags"})
+    return tags
+
+
 # ---------------------- TESTING -------------------------
 def test_translation():
     """Quick translation tests"""
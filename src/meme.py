@@ -1,9 +1,31 @@
-from PIL import Image, ImageDraw, ImageFont
+import io
 import os
+import glob
+import time
+from collections import deque
+from functools import lru_cache
+from . import metrics
 from .config import CONFIG
-from .utils import wrap_for_meme, mkhash
+from .utils import mkhash, get_logger
+
+log = get_logger()
+
+# Devanagari-capable fonts, probed in this order after $MEME_FONT_PATH
+_FONT_CANDIDATES = [
+    # Windows common Hindi fonts
+    "C:\\Windows\\Fonts\\Nirmala.ttf",
+    "C:\\Windows\\Fonts\\NirmalaUI.ttf",
+    "C:\\Windows\\Fonts\\Mangal.ttf",
+    # Linux common
+    "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSerifDevanagari-Regular.ttf",
+    "/usr/share/fonts/truetype/freefont/FreeSerif.ttf",
+    # Fallback
+    "arial.ttf",
+]
 
 def _try_load_font(path: str, size: int):
+    from PIL import ImageFont
     if not path:
         return None
     try:
@@ -11,104 +33,275 @@ def _try_load_font(path: str, size: int):
     except Exception:
         return None
 
+# ---- Render cache: everything below is loaded once per process (LRU), not per meme ----
+@lru_cache(maxsize=1)
+def _resolve_font_path():
+    """First loadable font path; the up-to-8 probes happen once per process."""
+    env_path = os.getenv("MEME_FONT_PATH", "").strip()
+    for p in [env_path, *_FONT_CANDIDATES]:
+        if _try_load_font(p, 12):
+            return p
+    return None
+
+@lru_cache(maxsize=64)
+def _font(path: str, size: int):
+    """FreeTypeFont per (file, size) — _autofit_lines asks for many sizes of the same file."""
+    from PIL import ImageFont
+    return ImageFont.truetype(path, size=size)
+
+@lru_cache(maxsize=4)
+def _decoded_template(path: str, mtime: float):
+    from PIL import Image
+    with Image.open(path) as im:
+        return im.convert("RGB")  # decoded once; callers get a cheap .copy()
+
+def _template(path: str):
+    return _decoded_template(path, os.path.getmtime(path)).copy()
+
+def clear_render_cache():
+    for fn in (_resolve_font_path, _font, _decoded_template, _word_px):
+        fn.cache_clear()
+
+def render_cache_info() -> dict:
+    return {fn.__name__: fn.cache_info()._asdict() for fn in (_resolve_font_path, _font, _decoded_template, _word_px)}
+
 def _load_hindi_font(img_width: int):
     """
     Load a Devanagari-capable font for Hindi + basic emoji glyphs.
     Color emojis may not render (Pillow limitation), but unicode emoji
     will at least fall back to monochrome on most systems.
     """
+    from PIL import ImageFont
     base_size = max(20, int(img_width * 0.045))
+    path = _resolve_font_path()
+    if path:
+        return _font(path, base_size)
+    return ImageFont.load_default()
 
-    # 1) Explicit font path via env
-    env_path = os.getenv("MEME_FONT_PATH", "").strip()
-    f = _try_load_font(env_path, base_size)
-    if f: return f
-
-    # 2) Windows common Hindi fonts
-    for p in [
-        "C:\\Windows\\Fonts\\Nirmala.ttf",
-        "C:\\Windows\\Fonts\\NirmalaUI.ttf",
-        "C:\\Windows\\Fonts\\Mangal.ttf",
-    ]:
-        f = _try_load_font(p, base_size)
-        if f: return f
-
-    # 3) Linux common
-    for p in [
-        "/usr/share/fonts/truetype/noto/NotoSansDevanagari-Regular.ttf",
-        "/usr/share/fonts/truetype/noto/NotoSerifDevanagari-Regular.ttf",
-        "/usr/share/fonts/truetype/freefont/FreeSerif.ttf",
-    ]:
-        f = _try_load_font(p, base_size)
-        if f: return f
-
-    # 4) Fallback
-    for p in ["arial.ttf"]:
-        f = _try_load_font(p, base_size)
-        if f: return f
+def _sized(font, size: int):
+    path = getattr(font, "path", None)
+    return _font(path, size) if isinstance(path, str) else font.font_variant(size=size)
 
-    return ImageFont.load_default()
+STROKE = 3          # outline width used by make_meme
+LINE_SPACING = 1.2
+MIN_SIZE = 16
+
+@lru_cache(maxsize=8192)
+def _word_px(path: str, size: int, word: str) -> float:
+    """Real advance width of `word` (cached per font file + size)."""
+    return _font(path, size).getlength(word)
+
+def _measurer(font):
+    path = getattr(font, "path", None)
+    if isinstance(path, str):
+        size = font.size
+        return lambda w: _word_px(path, size, w)
+    return font.getlength  # default bitmap font: no path to key a cache on
+
+def _line_step(font) -> int:
+    ascent, descent = font.getmetrics()
+    return int((ascent + descent + 2 * STROKE) * LINE_SPACING)
 
-def _autofit_lines(draw: ImageDraw.ImageDraw, text: str, font: ImageFont.FreeTypeFont, W: int, H: int):
+def _wrap_px(words, measure, max_px: float):
+    """Greedy wrap by pixel width. A word wider than the box gets its own (overflowing) line."""
+    space = measure(" ")
+    lines, cur, cur_w, widest = [], [], 0.0, 0.0
+    for w in words:
+        ww = measure(w)
+        if cur and cur_w + space + ww > max_px:
+            lines.append(" ".join(cur))
+            widest = max(widest, cur_w)
+            cur, cur_w = [w], ww
+        else:
+            cur_w = cur_w + space + ww if cur else ww
+            cur.append(w)
+    if cur:
+        lines.append(" ".join(cur))
+        widest = max(widest, cur_w)
+    return lines, widest
+
+def _autofit_lines(text: str, font: "ImageFont.FreeTypeFont", W: int, H: int):
     """
     Auto-wrap + shrink font to fit in lower third of the image.
+    Wraps by measured pixel width (font.getlength, cached per word and size) and binary-searches
+    the largest size between 16 px and the base size whose wrapped block fits the box.
     """
-    max_width_px = int(W * 0.9)
+    max_width_px = int(W * 0.9) - 2 * STROKE
     y_top = int(H * 0.65)
     y_max = int(H * 0.95)
+    words = (text or "").split()
+
+    if not hasattr(font, "font_variant"):  # legacy bitmap font: can't resize
+        lines, _ = _wrap_px(words, _measurer(font), max_width_px)
+        return font, lines, y_top
+
+    def layout(size):
+        f = _sized(font, size)
+        lines, widest = _wrap_px(words, _measurer(f), max_width_px)
+        ascent, descent = f.getmetrics()
+        bottom = y_top + (len(lines) - 1) * _line_step(f) + ascent + descent + STROKE
+        return f, lines, widest <= max_width_px and bottom <= y_max
 
-    size = getattr(font, "size", 24)
-
-    def wrapped(w_chars):
-        return wrap_for_meme(text, width=w_chars).split("\n")
-
-    def chars_for_size(s):
-        avg_char_px = s * 0.6  # heuristic
-        return max(8, int(max_width_px / max(1, avg_char_px)))
-
-    while size >= 16:
-        test_font = ImageFont.truetype(font.path, size=size) if hasattr(font, "path") else font.font_variant(size=size)
-        lines = wrapped(chars_for_size(size))
-        y = y_top
-        ok = True
-        for line in lines:
-            bbox = draw.textbbox((0, 0), line, font=test_font)
-            w, h = bbox[2], bbox[3]
-            if w > max_width_px or (y + h) > y_max:
-                ok = False
-                break
-            y += int(h * 1.2)
+    lo, hi = MIN_SIZE, max(MIN_SIZE, getattr(font, "size", 24))
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        f, lines, ok = layout(mid)
         if ok:
-            return test_font, lines, y_top
-        size -= 2
+            best = (f, lines)
+            lo = mid + 1
+        else:
+            hi = mid - 1
 
-    return (font.font_variant(size=16) if hasattr(font, "font_variant") else font), [text], y_top
+    if best is None:  # nothing fits: smallest size, still wrapped
+        f, lines, _ = layout(MIN_SIZE)
+        best = (f, lines)
+    return best[0], best[1], y_top
 
-def make_meme(text: str) -> tuple[str, str]:
+def _render(text: str):
+    """Draw `text` on the template → (PIL image, media_hash)."""
+    from PIL import ImageDraw
     template = CONFIG["posting"]["meme_template"]
-    img = Image.open(template).convert("RGB")
+    img = _template(template)
     W, H = img.size
     draw = ImageDraw.Draw(img)
 
     font = _load_hindi_font(W)
-    font, lines, y = _autofit_lines(draw, text, font, W, H)
+    font, lines, y = _autofit_lines(text, font, W, H)
+    step = _line_step(font)
 
     for line in lines:
-        bbox = draw.textbbox((0, 0), line, font=font)
-        w, h = bbox[2], bbox[3]
-        x = (W - w) // 2
+        x = int(W - font.getlength(line)) // 2
         draw.text(
             (x, y),
             line,
             font=font,
             fill=(255, 255, 255),
-            stroke_width=3,
+            stroke_width=STROKE,
             stroke_fill=(0, 0, 0),
         )
-        y += int(h * 1.2)
+        y += step
+    return img, mkhash(text, template)
+
 
+# ---- Encoder: best quality that fits MEDIA_MAX_BYTES (small uploads are faster and stay under X limits) ----
+_EXT = {"jpeg": "jpg", "webp": "webp", "png": "png"}
+ENCODE_STATS = deque(maxlen=256)  # one dict per encoded meme, newest last
+
+def _encode(img, fmt: str, quality: int = None) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        img.save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+    elif fmt == "webp":
+        img.save(buf, "WEBP", quality=quality, method=4)
+    else:
+        img.save(buf, "PNG", optimize=True)
+    return buf.getvalue()
+
+def _fit_quality(img, fmt: str, budget: int, q_min: int, q_max: int):
+    """Bisect the highest quality whose encoding fits `budget` → (data, quality, fits, encodes)."""
+    data = _encode(img, fmt, q_max)
+    if len(data) <= budget:  # common case: one encode
+        return data, q_max, True, 1
+    fit, low, tries = None, (data, q_max), 1
+    lo, hi = q_min, q_max - 1
+    while lo <= hi:
+        q = (lo + hi) // 2
+        data = _encode(img, fmt, q)
+        tries += 1
+        if len(data) <= budget:
+            fit, lo = (data, q), q + 1
+        else:
+            low, hi = (data, q), q - 1
+    data, q = fit or low
+    return data, q, fit is not None, tries
+
+def encode_media(img, budget: int = None):
+    """
+    Encode `img` for upload. Tries MEDIA_FORMATS in order and keeps the first that fits the
+    byte budget at the highest quality; if none fits, the smallest encoding wins.
+    Returns (data, format, info) — info is also appended to ENCODE_STATS.
+    """
+    m = CONFIG["media"]
+    budget = budget or m["max_bytes"]
+    t0 = time.perf_counter()
+    best, tries = None, 0
+    for fmt in m["formats"]:
+        if fmt == "png":
+            data, q, n = _encode(img, fmt), None, 1
+            fits = len(data) <= budget
+        else:
+            data, q, fits, n = _fit_quality(img, fmt, budget, m["quality_min"], m["quality_max"])
+        tries += n
+        if fits or best is None or len(data) < len(best[0]):
+            best = (data, fmt, q)
+        if fits:
+            break
+
+    data, fmt, q = best
+    info = {
+        "format": fmt, "quality": q, "bytes": len(data), "budget": budget,
+        "fits": len(data) <= budget, "encodes": tries,
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+    }
+    ENCODE_STATS.append(info)
+    log.info(f"🖼 meme encoded: {fmt} q={q} {len(data) // 1024} KB in {info['ms']:.0f} ms ({tries} encodes)")
+    return data, fmt, info
+
+def make_meme_buffer(text: str):
+    """Render + encode in memory → (file-like buffer with .name, media_hash, info); tweepy uploads it directly."""
+    with metrics.span("meme"):
+        with metrics.span("render"):
+            img, media_hash = _render(text)
+        with metrics.span("encode"):
+            data, fmt, info = encode_media(img)
+    metrics.count("meme.bytes", len(data))
+    buf = io.BytesIO(data)
+    buf.name = f"meme_{media_hash}.{_EXT[fmt]}"
+    return buf, media_hash, info
+
+def make_meme(text: str) -> tuple[str, str]:
+    """Render + encode to out/meme_<media_hash>.<ext> (drafts keep the file until posting)."""
+    buf, media_hash, _ = make_meme_buffer(text)
     os.makedirs("out", exist_ok=True)
-    media_hash = mkhash(text, template)
-    path = f"out/meme_{media_hash}.jpg"
-    img.save(path, "JPEG", quality=90)
+    path = os.path.join("out", buf.name)
+    with open(path, "wb") as f:
+        f.write(buf.getbuffer())
     return path, media_hash
+
+def _existing(media_hash: str):
+    found = glob.glob(os.path.join("out", f"meme_{media_hash}.*"))
+    return found[0] if found else None
+
+
+# ---- Batch rendering: Pillow text drawing is CPU-bound, so spread it over processes ----
+def _warm_worker(template: str):
+    """Process-pool initializer: decode the template and load the fonts before the first job."""
+    try:
+        _load_hindi_font(_template(template).width)
+    except Exception:
+        pass  # make_meme raises the real error for the job itself
+
+
+def render_memes(texts, workers: int = None) -> list:
+    """
+    Render many memes at once. Returns [(path, media_hash), ...] in the order of `texts`.
+    Texts whose out/meme_<media_hash>.* already exists are not rendered again,
+    and duplicate texts are rendered only once.
+    """
+    template = CONFIG["posting"]["meme_template"]
+    hashes = [mkhash(t, template) for t in texts]
+    paths = {h: _existing(h) for h in hashes}
+    todo = list(dict.fromkeys(t for t, h in zip(texts, hashes) if not paths[h]))
+
+    workers = min(workers or CONFIG["posting"]["meme_workers"] or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        rendered = [make_meme(t) for t in todo]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker,
+                                 initargs=(template,)) as ex:
+            rendered = list(ex.map(make_meme, todo))  # re-raises the first render error
+    for path, h in rendered:
+        paths[h] = path
+    return [(paths[h], h) for h in hashes]
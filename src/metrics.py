@@ -0,0 +1,162 @@
+"""
+Per-run timing spans and counters.
+
+    with metrics.run("news_batch"):          # src/run.py and the daemon wrap every job
+        with metrics.span("generate"):       # nested spans → "news_batch/generate/llm", …
+            ...
+        metrics.count("llm.calls")
+
+Spans are aggregated per path (count / total / max ms), counters are plain sums.
+When the run ends one JSON line is appended to METRICS_FILE (metrics.jsonl) and,
+if METRICS_PROM_FILE is set, a Prometheus textfile-collector file is updated
+with the latest run of that trigger. Outside a run, span() and count() cost a ContextVar lookup.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from .config import CONFIG
+from .utils import get_logger
+
+log = get_logger()
+
+_STACK: ContextVar[tuple] = ContextVar("metrics_stack", default=())
+_LOCK = threading.Lock()
+_RUN = None  # the active run (jobs never overlap: one process = one run at a time)
+
+
+class _Run:
+    def __init__(self, trigger: str):
+        self.trigger = trigger
+        self.started = time.time()
+        self.t0 = time.perf_counter()
+        self.spans = {}     # path → [count, total_ms, max_ms]
+        self.counters = {}  # name → number
+
+    def add_span(self, path: str, ms: float):
+        with _LOCK:
+            agg = self.spans.setdefault(path, [0, 0.0, 0.0])
+            agg[0] += 1
+            agg[1] += ms
+            agg[2] = max(agg[2], ms)
+
+    def add(self, name: str, n):
+        with _LOCK:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, error: str = None) -> dict:
+        return {
+            "trigger": self.trigger,
+            "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec="seconds"),
+            "duration_ms": round((time.perf_counter() - self.t0) * 1000, 1),
+            "ok": error is None,
+            "error": error,
+            "spans": {p: {"count": c, "total_ms": round(t, 1), "max_ms": round(m, 1)}
+                      for p, (c, t, m) in sorted(self.spans.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+
+@contextmanager
+def span(name: str):
+    """Time a block; nested spans get a "parent/child" path."""
+    if _RUN is None:
+        yield
+        return
+    stack = _STACK.get() + (name,)
+    token = _STACK.set(stack)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _STACK.reset(token)
+        run_ = _RUN
+        if run_ is not None:
+            run_.add_span("/".join(stack), (time.perf_counter() - t0) * 1000)
+
+
+def count(name: str, n=1):
+    """Add `n` to counter `name` (e.g. llm.calls, llm.tokens.prompt, dedupe.skipped)."""
+    run_ = _RUN
+    if run_ is not None and n:
+        run_.add(name, n)
+
+
+def _write_jsonl(path: str, rec: dict):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+
+def _prom_name(s: str) -> str:
+    return "".join(ch if ch.isalnum() else "_" for ch in s)
+
+
+def _prom_samples(rec: dict):
+    trig = rec["trigger"]
+    yield f'bot_run_duration_seconds{{trigger="{trig}"}}', f'{rec["duration_ms"] / 1000:.3f}'
+    yield f'bot_run_success{{trigger="{trig}"}}', str(int(rec["ok"]))
+    yield f'bot_run_timestamp_seconds{{trigger="{trig}"}}', str(int(time.time()))
+    for p, s in rec["spans"].items():
+        yield f'bot_span_seconds{{trigger="{trig}",span="{p}"}}', f'{s["total_ms"] / 1000:.4f}'
+        yield f'bot_span_count{{trigger="{trig}",span="{p}"}}', str(s["count"])
+    for name, value in rec["counters"].items():
+        yield f'bot_{_prom_name(name)}{{trigger="{trig}"}}', str(value)
+
+
+def _write_prom(path: str, rec: dict):
+    """
+    Prometheus textfile-collector format: the latest run of every trigger, all gauges.
+    Samples of other triggers are kept; the file is replaced atomically (node_exporter may read mid-run).
+    """
+    mine = f'trigger="{rec["trigger"]}"'
+    samples = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            samples = [ln.rstrip("\n") for ln in f if ln.strip() and not ln.startswith("#") and mine not in ln]
+    except OSError:
+        pass
+    samples += [f"{series} {value}" for series, value in _prom_samples(rec)]
+
+    by_metric = {}
+    for ln in samples:
+        by_metric.setdefault(ln.split("{", 1)[0], []).append(ln)
+    lines = []
+    for metric in sorted(by_metric):
+        lines.append(f"# TYPE {metric} gauge")
+        lines.extend(by_metric[metric])
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
+
+
+@contextmanager
+def run(trigger: str):
+    """One bot run (trigger or daemon job): collect spans/counters, then export them."""
+    global _RUN
+    outer, _RUN = _RUN, _Run(trigger)
+    current, error = _RUN, None
+    try:
+        with span(trigger):
+            yield current
+    except BaseException as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _RUN = outer
+        rec = current.record(error)
+        cfg = CONFIG["metrics"]
+        try:
+            if cfg["file"]:
+                _write_jsonl(cfg["file"], rec)
+            if cfg["prom_file"]:
+                _write_prom(cfg["prom_file"], rec)
+        except OSError as e:
+            log.warning(f"⚠ Metrics not written: {e}")
+        top = sorted(rec["spans"].items(), key=lambda kv: kv[1]["total_ms"], reverse=True)[1:4]
+        detail = ", ".join(f"{p} {s['total_ms']:.0f} ms" for p, s in top)
+        log.info(f"⏱ {trigger}: {rec['duration_ms'] / 1000:.2f}s" + (f" — {detail}" if detail else ""))
@@ -0,0 +1,79 @@
+"""
+MinHash fingerprints for near-duplicate story detection.
+
+Headlines about the same event from different outlets share most of their
+content words but rarely match exactly. A MinHash signature estimates the
+Jaccard similarity of two word sets; LSH banding turns "find similar
+signatures" into a handful of indexed equality lookups in SQLite.
+"""
+import re
+import hashlib
+from array import array
+from typing import List, Optional, Tuple
+
+from .utils import normalize_title
+
+NUM_PERM = 64
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+MIN_TOKENS = 5  # shorter texts are too vague to call duplicates
+
+_PRIME = (1 << 61) - 1
+_MASK32 = (1 << 32) - 1
+
+
+def _coef(tag: str) -> int:
+    # derived from a hash, not random.seed(): stored signatures must stay valid across Python versions
+    return int.from_bytes(hashlib.blake2b(tag.encode(), digest_size=8).digest(), "big") % _PRIME
+
+
+_PERMS = [(_coef(f"a{i}") or 1, _coef(f"b{i}")) for i in range(NUM_PERM)]
+
+_TOKEN_RE = re.compile(r"[0-9a-z\u0900-\u097F]+")
+_STOP = set("""
+a an the of in on at to for from by with and or but is are was were be been has have had
+as it its this that these those after over into amid says said will can new news live update updates
+है और का की के से तो था थी पर में को ने हो हैं ये यह वो या भी सब अब लिए कर किया एक बाद साथ गया गई
+""".split())
+
+
+def _h(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def tokens(text: str) -> List[str]:
+    """Content words (Latin + Devanagari) of a headline, publisher suffix removed."""
+    return [w for w in _TOKEN_RE.findall(normalize_title(text)) if w not in _STOP and len(w) > 1]
+
+
+def signature(text: str) -> Optional[Tuple[int, ...]]:
+    toks = set(tokens(text))
+    if len(toks) < MIN_TOKENS:
+        return None
+    hashed = [_h(w) for w in toks]
+    return tuple(min((a * x + b) % _PRIME for x in hashed) & _MASK32 for a, b in _PERMS)
+
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def band_keys(sig) -> List[int]:
+    """One signed 64-bit key per LSH band (fits a SQLite INTEGER)."""
+    out = []
+    for i in range(BANDS):
+        chunk = sig[i * ROWS:(i + 1) * ROWS]
+        raw = hashlib.blake2b(repr((i, chunk)).encode(), digest_size=8).digest()
+        out.append(int.from_bytes(raw, "big", signed=True))
+    return out
+
+
+def pack(sig) -> bytes:
+    return array("I", sig).tobytes()
+
+
+def unpack(blob: bytes) -> Tuple[int, ...]:
+    arr = array("I")
+    arr.frombytes(blob)
+    return tuple(arr)
@@ -1,39 +1,60 @@
-from datetime import datetime, timedelta, timezone
-import feedparser
+import os
+import math
+import calendar
+from datetime import datetime, timezone
 
+from . import metrics
 from .config import CONFIG
-from .db import connect, seen_hash, mark_posted, cache_item, select_uncached
-from .utils import mkhash, clean_topic, get_logger, is_sensitive
-from .llm import make_tweet, translate_to_hindi
-from .meme import make_meme
+from .db import (
+    connect, seen_hash, seen_source, mark_posted, cache_items_bulk, claim_next_pending, finish_item,
+    release_item, select_untranslated, set_translations, add_fingerprint, near_duplicate,
+    add_draft, count_ready_drafts, pop_ready_draft, finish_draft, retry_draft, quota_usage,
+    STATUS_POSTED, STATUS_SKIPPED, STATUS_FAILED, STATUS_DRAFTED, DRAFT_READY,
+)
+from .minhash import signature, similarity
+from .utils import mkhash, clean_topic, get_logger, sensitive_categories, source_keys, safe_tweet
+from .llm import make_tweet, translate_to_hindi, translate_many, get_hindi_percentage, llm_cache_stats
+from .meme import make_meme_buffer, render_memes
 from .poster import post_text, post_text_with_media
+from .ratelimit import PostDeferred, headroom
 
-# ✅ You missed these ↓
-from .sources.gnews import fetch_gnews
-from .sources.newsapi import fetch_newsapi
+from .http_cache import http_stats
+from .sources.aggregate import fetch_all
+from .sources.google_rss import fetch_google_rss
 
 log = get_logger()
 
 
 # ------------------ (1) Posting Limits ------------------
-def _iso_bounds_utc():
-    now = datetime.now(timezone.utc)
-    start_day = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
-    next_day = start_day + timedelta(days=1)
-    start_month = datetime(now.year, now.month, 1, tzinfo=timezone.utc)
-    next_month = (
-        datetime(now.year + 1, 1, tzinfo=timezone.utc)
-        if now.month == 12
-        else datetime(now.year, now.month + 1, 1, tzinfo=timezone.utc)
-    )
-    return start_day.isoformat(), next_day.isoformat(), start_month.isoformat(), next_month.isoformat()
-
-
 def _counts(con):
-    sd, nd, sm, nm = _iso_bounds_utc()
-    daily = con.execute("SELECT COUNT(*) FROM posts WHERE posted_at >= ? AND posted_at < ?", (sd, nd)).fetchone()[0]
-    monthly = con.execute("SELECT COUNT(*) FROM posts WHERE posted_at >= ? AND posted_at < ?", (sm, nm)).fetchone()[0]
-    return daily, monthly
+    return quota_usage(con, CONFIG["x"]["account"])
+
+
+def quota_status(con, now: datetime = None) -> dict:
+    """
+    Ledger usage plus a projection for the scheduler:
+    at the current month's posting rate, on which day is the monthly cap hit (None = not this month)?
+    The rate is measured over at least one day and never exceeds DAILY_TWEET_LIMIT, so a post
+    early on the 1st does not project a month of back-to-back posting.
+    """
+    now = now or datetime.now(timezone.utc)
+    daily, monthly = quota_usage(con, CONFIG["x"]["account"], now=now)
+    days_in_month = calendar.monthrange(now.year, now.month)[1]
+    elapsed = (now.day - 1) + (now.hour * 3600 + now.minute * 60 + now.second) / 86400
+    rate = min(monthly / max(1.0, elapsed), CONFIG["limits"]["daily"])
+    cap = CONFIG["limits"]["monthly"]
+    hit_day = None
+    if monthly >= cap:
+        hit_day = now.day
+    elif rate > 0 and math.ceil(cap / rate) <= days_in_month:
+        hit_day = math.ceil(cap / rate)
+    return {
+        "daily": daily, "daily_cap": CONFIG["limits"]["daily"],
+        "monthly": monthly, "monthly_cap": cap,
+        "rate_per_day": round(rate, 2),
+        "projected_month_total": round(rate * days_in_month),
+        "monthly_cap_hit_day": hit_day,
+    }
 
 
 def _allowed_to_post(con):
@@ -45,123 +66,389 @@ def _allowed_to_post(con):
     return True, f"✅ Posting allowed (daily={daily}, monthly={monthly})"
 
 
+def _near_dup(con, sig, kinds=("posted",)):
+    d = CONFIG["dedupe"]
+    return near_duplicate(con, sig, d["near_dup_days"], d["near_dup_jaccard"], kinds)
+
+
+def _seen_keys(con, keys):
+    return seen_source(con, keys, CONFIG["dedupe"]["near_dup_days"])
+
+
+def _already_covered(con, title: str, url: str = None, item_hash: str = None) -> bool:
+    """Exact source keys first (one PK lookup), then the MinHash story index."""
+    return _seen_keys(con, source_keys(title, url, item_hash)) or _near_dup(con, signature(title))
+
+
 # ------------------ (2) Single Tweet Posting ------------------
-def post_one_tweet(text_hindi: str, source: str, url: str = None, use_meme: bool = True, con=None):
-    """✅ Post only ONE tweet. If it fails → stop, no retry."""
+def post_one_tweet(text_hindi: str, source: str, url: str = None, use_meme: bool = True, con=None,
+                   title: str = None, item_hash: str = None, media: tuple = None):
+    """
+    ✅ Post only ONE tweet. If it fails → stop, no retry.
+    `title` / `item_hash` describe the source story; they feed the canonical dedupe keys
+    so a re-generated (different) text for the same story is still caught.
+    `media` = (path, media_hash) of a pre-rendered meme (drafts); rendered here otherwise.
+    Returns STATUS_POSTED, STATUS_SKIPPED (already posted — move on), STATUS_FAILED (stop),
+    or None when nothing was sent (TEST_MODE, posting cap) — the caller gives the story back untouched.
+    """
     h = mkhash(text_hindi, url or "", source)
+    keys = source_keys(title, url, item_hash)
+    sig = signature(title)
 
-    # Avoid duplicates
-    if con and seen_hash(con, h):
+    # Avoid duplicates (same story by URL/title/hash, a near-identical story, or identical text)
+    with metrics.span("dedupe"):
+        dup = con and (_seen_keys(con, keys) or _near_dup(con, sig) or seen_hash(con, h))
+    if dup:
         log.info(f"⏩ डुप्लिकेट स्किप ({source}): {text_hindi[:50]}…")
-        return False
+        metrics.count("dedupe.skipped")
+        return STATUS_SKIPPED
 
     allowed, reason = _allowed_to_post(con)
     if not allowed:
         log.warning(f"🚫 {reason} — skipping this tweet.")
-        return False
+        return None
+
+    if CONFIG["testing"]["test_mode"]:
+        log.info(f"[TEST_MODE] ❌ Not posting to X — {text_hindi}")
+        return None
 
     log.info(f"✅ {reason} — posting now…")
 
     try:
-        if CONFIG["testing"]["test_mode"]:
-            log.info(f"[TEST_MODE] ❌ Not posting to X — {text_hindi}")
-            tweet_id, media_hash = None, None
+        if use_meme:
+            if media and media[0] and os.path.exists(media[0]):
+                path, media_hash = media
+                with metrics.span("post"):
+                    tweet_id = post_text_with_media(text_hindi, path)
+            else:  # encoded in memory, uploaded without a temp file
+                buf, media_hash, _ = make_meme_buffer(text_hindi)
+                with metrics.span("post"):
+                    tweet_id = post_text_with_media(text_hindi, buf.name, file=buf)
         else:
-            if use_meme:
-                path, media_hash = make_meme(text_hindi)
-                tweet_id = post_text_with_media(text_hindi, path)
-            else:
-                media_hash = None
+            media_hash = None
+            with metrics.span("post"):
                 tweet_id = post_text(text_hindi)
 
         if not tweet_id:
             log.error("❌ Posting failed — not retrying this run.")
-            return False
+            metrics.count("posts.failed")
+            return STATUS_FAILED
 
         if con:
-            mark_posted(con, h, text_hindi, source, url or "", media_hash, tweet_id)
-
-        return True
-
+            with metrics.span("db"):
+                add_fingerprint(con, sig, "posted", h, commit=False)  # committed by mark_posted
+                mark_posted(con, h, text_hindi, source, url or "", media_hash, tweet_id, keys=keys,
+                            account=CONFIG["x"]["account"])
+        metrics.count("posts.ok")
+        return STATUS_POSTED
+
+    except PostDeferred:
+        metrics.count("posts.deferred")
+        raise  # not a failure: the caller keeps the story/draft for a later run
     except Exception as e:
         log.error(f"❌ Fatal Error: {e} — Stopping.")
-        return False
+        metrics.count("posts.failed")
+        return STATUS_FAILED
+
+
+def _raw_text(title: str, desc: str) -> str:
+    return f"{title} — {desc}" if desc else title or ""
 
 
 # ------------------ (3) Hindi News Posting (Batch = 1 Tweet) ------------------
-def run_news_post_batch(count=1):
-    """✅ Posts exactly ONE tweet (count=1). Stops after first success OR fail."""
+def _skip_if_covered(con, item) -> bool:
+    """Same story already posted (any outlet URL/title)? Mark the item skipped — before touching Groq."""
+    h, title, _, url, _, _ = item
+    with metrics.span("dedupe"):
+        covered = _already_covered(con, title, url, h)
+    if covered:
+        log.info(f"⏩ पहले ही पोस्ट हो चुकी खबर, स्किप: {(title or '')[:50]}…")
+        metrics.count("dedupe.skipped")
+        finish_item(con, h, STATUS_SKIPPED)
+    return covered
+
+
+def _tweet_for_item(item) -> str:
+    """The LLM steps for one cache item (no DB access — safe in a worker thread)."""
+    _, title, desc, _, _, text_hi = item
+    raw = _raw_text(title, desc)
+    return make_tweet(raw, mode="funny", add_hashtags_from=raw, core_hi=text_hi)
+
+
+def _draft_from_item(con, item):
+    """
+    Run the LLM steps for one leased cache item.
+    Returns the finished tweet text, or None if the story was skipped as already covered.
+    """
+    if _skip_if_covered(con, item):
+        return None
+    try:
+        return _tweet_for_item(item)
+    except Exception:
+        release_item(con, item[0])  # give the story back, lease would expire anyway
+        raise
+
+
+def _post_generated(con, item, text) -> str:
+    """Post an inline-generated tweet for a leased item and settle the item; returns the outcome."""
+    h, title, _, url, source, _ = item
+    try:
+        outcome = post_one_tweet(text, source=source, url=url, use_meme=False, con=con,
+                                 title=title, item_hash=h)
+    except PostDeferred:
+        # keep the generated text: the next run posts it without another LLM call
+        _keep_as_draft(con, item, text)
+        raise
+    except Exception:
+        release_item(con, h)
+        raise
+    if outcome is None:
+        release_item(con, h)  # TEST_MODE / cap: the story stays queued
+    elif outcome == STATUS_FAILED and CONFIG["drafts"]["max_attempts"] > 1:
+        _keep_as_draft(con, item, text, attempts=1)  # X error: the next run retries the same tweet
+    else:
+        finish_item(con, h, outcome)
+    return outcome
+
+
+def _keep_as_draft(con, item, text, attempts: int = 0):
+    h, title, _, url, source, _ = item
+    add_draft(con, h, text, title, url, source, None, None, attempts=attempts)
+    finish_item(con, h, STATUS_DRAFTED)
+
+
+def _post_draft(con, draft) -> str:
+    """Post a pre-generated draft: no LLM work, just the X call. Returns the outcome."""
+    draft_id, item_hash, text, title, url, source, media_path, media_hash = draft
+    log.info(f"📝 Ready draft मिला (#{draft_id}) — सीधे पोस्ट कर रहे हैं")
+    try:
+        outcome = post_one_tweet(text, source=source, url=url, use_meme=bool(media_path), con=con,
+                                 title=title, item_hash=item_hash, media=(media_path, media_hash))
+    except Exception:
+        finish_draft(con, draft_id, DRAFT_READY)
+        raise
+    if outcome is None:
+        finish_draft(con, draft_id, DRAFT_READY)  # TEST_MODE / cap: the draft stays ready
+        return outcome
+    if outcome == STATUS_FAILED:
+        # X error (5xx, network, 403 …): ready again for the next run, dropped after POST_MAX_ATTEMPTS
+        if not retry_draft(con, draft_id, CONFIG["drafts"]["max_attempts"]):
+            finish_item(con, item_hash, outcome)
+        return outcome
+    # story posted meanwhile (e.g. by trend_window) → draft and story are skipped, not failed
+    finish_draft(con, draft_id, outcome)
+    finish_item(con, item_hash, outcome)
+    return outcome
+
+
+def run_news_post_batch(count=None):
+    """
+    ✅ Posts up to `count` tweets (default NEWS_BATCH_COUNT, 1). Stops on first fail;
+    drafts/stories that turn out to be already posted are skipped and the next one is tried.
+    Ready drafts (TRIGGER=prepare_drafts) are posted first; otherwise the next pending
+    story is generated inline. With PIPELINE=true and count > 1 the stories go through
+    the asyncio pipeline (src/pipeline.py): generation overlaps posting.
+    """
+    count = count or CONFIG["posting"]["news_batch_count"]
     log.info(f"📢 {count} हिंदी न्यूज़ पोस्ट करने की कोशिश…")
-    con = connect(CONFIG["db"]["path"])
-    rows = select_uncached(con, limit=50)
+    con = connect(CONFIG["db"]["path"], account=CONFIG["x"]["account"])
 
-    if not rows:
-        log.warning("⛔ कोई नई खबर उपलब्ध नहीं — पहले cache_news चलाओ")
+    # Check limits BEFORE spending any Groq calls
+    allowed, reason = _allowed_to_post(con)
+    if not allowed:
+        log.warning(f"🚫 {reason} — कोई LLM call नहीं किया।")
         return
 
     posted = 0
-    for h, title, desc, url, source in rows:
-        if posted >= count:
-            break
-
-        raw = f"{title} — {desc}" if desc else title or ""
-        hindi_tweet = make_tweet(raw, mode="funny", add_hashtags_from=raw)
-
-        success = post_one_tweet(hindi_tweet, source=source, url=url, use_meme=False, con=con)
-        posted += 1
-        break  # ✅ Stop after first tweet attempt (success or fail)
-
-    log.info(f"✅ {posted} ट्वीट पोस्ट करने का प्रयास समाप्त ✅")
+    if CONFIG["pipeline"]["enabled"] and count > 1:
+        from .pipeline import run_news_pipeline  # lazy: asyncio only when the pipeline is on
+        posted = run_news_pipeline(count)
+        count = 0  # skip the serial loop
+    try:
+        while posted < count:
+            with metrics.span("db"):
+                draft = pop_ready_draft(con, CONFIG["drafts"]["max_age_hours"])
+            if draft:
+                outcome = _post_draft(con, draft)  # deferred → draft goes back to 'ready'
+            else:
+                with metrics.span("db"):
+                    item = claim_next_pending(con, CONFIG["news"]["lease_seconds"])
+                if not item:
+                    if posted == 0:
+                        log.warning("⛔ कोई नई खबर उपलब्ध नहीं — पहले cache_news चलाओ")
+                    break
+
+                hindi_tweet = _draft_from_item(con, item)
+                if hindi_tweet is None:
+                    continue
+                outcome = _post_generated(con, item, hindi_tweet)
+
+            if outcome == STATUS_SKIPPED:
+                continue  # duplicate, nothing was sent — try the next draft/story
+            if outcome != STATUS_POSTED:
+                break  # ✅ Stop after first failed attempt
+            posted += 1
+    except PostDeferred as e:
+        log.warning(f"⏳ {e}")
+
+    log.info(f"✅ {posted} ट्वीट पोस्ट करने का प्रयास समाप्त ✅ (LLM cache: {llm_cache_stats()})")
+    if not CONFIG["testing"]["test_mode"]:
+        log.info(f"📊 Posting headroom: {headroom()}")
+
+
+# ------------------ (3b) Draft Pipeline (LLM work ahead of posting) ------------------
+def prepare_drafts(target: int = None):
+    """
+    Generate finished, safe_tweet-validated tweets (+ optional meme) for pending stories,
+    until `target` fresh drafts are in stock. news_batch then only does the X call.
+    """
+    target = target or CONFIG["drafts"]["target"]
+    con = connect(CONFIG["db"]["path"], account=CONFIG["x"]["account"])
+    max_age = CONFIG["drafts"]["max_age_hours"]
+    need = target - count_ready_drafts(con, max_age)
+    if need <= 0:
+        log.info(f"📝 {target} ready drafts पहले से मौजूद — कुछ नहीं करना")
+        return 0
+
+    with_memes = CONFIG["drafts"]["memes"] and CONFIG["posting"]["use_memes"]
+    ready = []  # (hash, title, url, source, text) — claimed, validated, not yet stored
+    try:
+        while len(ready) < need:
+            item = claim_next_pending(con, CONFIG["news"]["lease_seconds"])
+            if not item:
+                break
+            text = _draft_from_item(con, item)
+            if text is None:
+                continue
+            h, title, _, url, source, _ = item
+            if not text or text.startswith("⚠") or safe_tweet(text) != text:
+                log.warning(f"⚠ Draft invalid, story failed: {(title or '')[:50]}…")
+                finish_item(con, h, STATUS_FAILED)
+                continue
+            ready.append((h, title, url, source, text))
+    except Exception:
+        for h, *_ in ready:
+            release_item(con, h)
+        raise
+
+    media = [(None, None)] * len(ready)
+    if with_memes and ready:
+        try:
+            with metrics.span("meme"):
+                media = render_memes([r[4] for r in ready])  # one process-pool batch for all drafts
+        except Exception as e:
+            log.warning(f"⚠ Meme render failed, drafts stay text-only: {e}")
+
+    for (h, title, url, source, text), (media_path, media_hash) in zip(ready, media):
+        add_draft(con, h, text, title, url, source, media_path, media_hash)
+        finish_item(con, h, STATUS_DRAFTED)
+    made = len(ready)
+
+    log.info(f"📝 {made} नए drafts तैयार (target={target})")
+    return made
 
 
 # ------------------ (4) Optional: Cache News ------------------
 def cache_news_batch():
     log.info("🗞 समाचार सेव कर रहे हैं…")
-    con = connect(CONFIG["db"]["path"])
+    con = connect(CONFIG["db"]["path"], account=CONFIG["x"]["account"])
 
-    try:
-        items = fetch_gnews(CONFIG["news"]["gnews_limit"])
-        src = "gnews"
-    except:
-        if CONFIG["news"]["newsapi_key"]:
-            items = fetch_newsapi(CONFIG["news"]["newsapi_limit"])
-            src = "newsapi"
-        else:
-            log.error("❌ No news source available.")
-            return
-
-    for title, desc, url in items:
-        h = mkhash(title or "", desc or "", url or "")
-        cache_item(con, h, title, desc, url, src)
+    # All configured sources at once; one slow/broken source no longer blocks the rest
+    with metrics.span("fetch"):
+        items, stats = fetch_all()
+    if not items:
+        log.error(f"❌ No news source returned items: {stats}")
+        return
 
-    log.info("✅ News cached in database.")
+    rows, sigs, batch_sigs = [], {}, []
+    near = 0
+    threshold = CONFIG["dedupe"]["near_dup_jaccard"]
+    with metrics.span("dedupe"):
+        for title, desc, url, src in items:
+            h = mkhash(title or "", desc or "", url or "")
+            sig = signature(title)
+            # Same event already cached/posted (or earlier in this batch) from another outlet → don't queue it
+            if _near_dup(con, sig, kinds=("cached", "posted")) or \
+                    (sig and any(similarity(sig, other) >= threshold for other in batch_sigs)):
+                near += 1
+                continue
+            if sig:
+                batch_sigs.append(sig)
+                sigs[h] = sig
+            rows.append((h, title, desc, url, src))
+
+    with metrics.span("db"):
+        new, dup = cache_items_bulk(con, rows, sigs)  # one transaction for the whole batch
+    metrics.count("news.fetched", len(items))
+    metrics.count("news.new", new)
+    metrics.count("dedupe.duplicates", dup)
+    metrics.count("dedupe.near_duplicates", near)
+    log.info(f"✅ News cached in database (new={new}, duplicates={dup}, near-duplicates={near}).")
+    log.info(f"🌐 HTTP cache: {http_stats()}")
+
+    if CONFIG["news"]["translate_on_cache"] and CONFIG["llm"]["groq_api_key"]:
+        with metrics.span("translate"):
+            translate_pending(con)
+
+
+def translate_pending(con, limit: int = 50):
+    """Batch-translate queued stories now, so the posting job never waits on translation."""
+    rows = select_untranslated(con, limit)
+    if not rows:
+        return 0
+    hindi = translate_many([_raw_text(title, desc) for _, title, desc in rows])
+    pairs = [(h, hi) for (h, _, _), hi in zip(rows, hindi) if get_hindi_percentage(hi) >= 50]
+    set_translations(con, pairs)
+    log.info(f"🈯 {len(pairs)}/{len(rows)} खबरों का हिंदी अनुवाद सेव किया")
+    return len(pairs)
 
 
 # ------------------ (5) Trend Posting (Google RSS) ------------------
+def _trend_tweet(topic: str):
+    """(tweet, use_meme) for one trend topic — LLM work only, no DB access."""
+    with metrics.span("translate"):
+        text_hi = translate_to_hindi(topic)
+    sensitive = sensitive_categories(text_hi)
+
+    if sensitive and CONFIG["safety"]["avoid_sensitive_humor"]:
+        log.info(f"🛡 Sensitive topic ({', '.join(sorted(sensitive))}) — no humor, no meme")
+        mode = "accountability"
+        use_meme = False
+    else:
+        mode = "funny"
+        use_meme = CONFIG["posting"]["use_memes"]
+
+    return make_tweet(text_hi, mode=mode, add_hashtags_from=text_hi), use_meme
+
+
 def run_trend_window():
     log.info("📡 ट्रेंडिंग RSS (हिंदी) लाया जा रहा है…")
-    con = connect(CONFIG["db"]["path"])
+    con = connect(CONFIG["db"]["path"], account=CONFIG["x"]["account"])
 
     try:
-        feed = feedparser.parse("https://news.google.com/rss?hl=hi-IN&gl=IN&ceid=IN:hi")
-        topics = [clean_topic(entry.title) for entry in feed.entries if clean_topic(entry.title)]
+        with metrics.span("fetch"):
+            entries = fetch_google_rss(n=100, timeout=CONFIG["news"]["fetch_deadline"])
+        topics = [clean_topic(title) for title, _, _ in entries if clean_topic(title)]
+        # Drop already-posted stories before slicing, so we fall through to a fresh one
+        topics = [t for t in topics if not _already_covered(con, t)]
         topics = topics[:CONFIG["posting"]["trends_per_window"]]
         log.info(f"🔥 Topics: {topics}")
     except Exception as e:
         log.error(f"❌ RSS Error: {e}")
         return
 
-    for topic in topics:
-        text_hi = translate_to_hindi(topic)
-        sensitive = is_sensitive(text_hi)
-
-        if sensitive and CONFIG["safety"]["avoid_sensitive_humor"]:
-            mode = "accountability"
-            use_meme = False
-        else:
-            mode = "funny"
-            use_meme = CONFIG["posting"]["use_memes"]
+    # One tweet per topic (TRENDS_PER_WINDOW, default 1) in both modes; the pipeline only overlaps the work
+    if CONFIG["pipeline"]["enabled"] and len(topics) > 1:
+        from .pipeline import run_trend_pipeline  # lazy: asyncio only when the pipeline is on
+        run_trend_pipeline(topics)
+        return
 
-        tweet = make_tweet(text_hi, mode=mode, add_hashtags_from=text_hi)
-        post_one_tweet(tweet, source="trend_hi", use_meme=use_meme, con=con)
-        break  # ✅ Only one trend tweet per run
+    for topic in topics:
+        tweet, use_meme = _trend_tweet(topic)
+        try:
+            outcome = post_one_tweet(tweet, source="trend_hi", use_meme=use_meme, con=con, title=topic)
+        except PostDeferred as e:
+            log.warning(f"⏳ Trend tweet skipped: {e}")
+            break
+        if outcome not in (STATUS_POSTED, STATUS_SKIPPED):
+            break  # ✅ Stop after first failed attempt
@@ -0,0 +1,233 @@
+"""
+Asyncio pipeline mode (PIPELINE=true) for news_batch and trend_window.
+
+    source ──queue──▶ generate (× PIPELINE_GENERATE_WORKERS) ──queue──▶ post (× 1)
+
+The stages are joined by bounded queues (PIPELINE_QUEUE_SIZE), so only a few
+stories are claimed ahead of the poster. Generation (translate + make_tweet +
+meme) runs in worker threads, and several stories wait on Groq at once while
+the previous tweet is being posted. N tweets cost about N posts plus one
+generation, instead of N × (generation + post).
+
+SQLite connections belong to the thread that opened them. Every statement of a
+pipeline run therefore goes through one single-thread executor that owns the
+run's connection. The post stage (quota check → X call → ledger) runs there
+too, one tweet at a time, which is what the quota and the rate limiter need
+anyway. The first failed post stops the run like the serial loop does. Stories
+already claimed go back to the queue, and tweets already generated are kept as
+drafts.
+"""
+import asyncio
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import CONFIG
+from .db import (
+    connect, claim_next_pending, pop_ready_draft, release_item, finish_draft,
+    DRAFT_READY, STATUS_POSTED, STATUS_SKIPPED,
+)
+from .meme import make_meme
+from .orchestrator import (
+    post_one_tweet, _skip_if_covered, _tweet_for_item, _post_generated, _post_draft, _keep_as_draft,
+    _trend_tweet,
+)
+from .ratelimit import PostDeferred
+from .utils import get_logger
+
+log = get_logger()
+
+_DONE = object()  # end-of-stream marker
+
+
+class _Db:
+    """The run's SQLite connection, used only from its own thread."""
+
+    def __init__(self):
+        self._ex = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db")
+        self.con = None
+
+    async def __call__(self, func, *args, **kwargs):
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self._ex, call)
+
+    async def open(self):
+        self.con = await self(connect, CONFIG["db"]["path"], account=CONFIG["x"]["account"])
+
+    def close(self):
+        if self.con is not None:
+            self._ex.submit(self.con.close)
+        self._ex.shutdown(wait=True)
+
+
+async def _pipeline(db, produce, generate, post, unclaim=None, keep=None, limit: int = None) -> int:
+    """
+    Run one pipeline; returns the number of tweets posted (at most `limit`).
+    produce(to_generate, to_post, stop, slots) — async source filling the two queues; checks `stop`.
+      With a `limit`, it takes one of `slots` per job queued; a skipped job gives its slot back.
+    generate(job) → post job or None      — worker thread, no DB access.
+    post(con, job) → outcome             — DB thread; STATUS_POSTED, STATUS_SKIPPED (go on) or failure.
+    unclaim(con, job) / keep(con, job)    — DB thread; settle jobs left over after a stop.
+    """
+    cfg = CONFIG["pipeline"]
+    workers = max(1, cfg["generate_workers"])
+    to_generate = asyncio.Queue(maxsize=max(1, cfg["queue_size"]))
+    to_post = asyncio.Queue(maxsize=max(1, cfg["queue_size"]))
+    stop = asyncio.Event()
+    slots = asyncio.Semaphore(limit) if limit else None
+    state = {"posted": 0, "error": None}
+
+    def halt():
+        stop.set()
+        if slots is not None:
+            slots.release()  # wake the source if it waits for a slot
+
+    async def source():
+        try:
+            await produce(to_generate, to_post, stop, slots)
+        finally:
+            for _ in range(workers):
+                await to_generate.put(_DONE)
+
+    async def generator():
+        while (job := await to_generate.get()) is not _DONE:
+            if stop.is_set():
+                if unclaim:
+                    await db(unclaim, db.con, job)
+                continue
+            try:
+                out = await asyncio.to_thread(generate, job)
+            except Exception as e:
+                log.error(f"❌ Generation failed: {e}")
+                if unclaim:
+                    await db(unclaim, db.con, job)
+                continue
+            if out is not None:
+                await to_post.put(out)
+
+    async def poster():
+        while (job := await to_post.get()) is not _DONE:
+            if stop.is_set():
+                if keep:
+                    await db(keep, db.con, job)
+                continue
+            try:
+                outcome = await db(post, db.con, job)
+            except PostDeferred as e:
+                log.warning(f"⏳ {e}")
+                outcome = None
+            except Exception as e:
+                state["error"] = state["error"] or e
+                outcome = None
+            if outcome == STATUS_POSTED:
+                state["posted"] += 1
+                if limit and state["posted"] >= limit:
+                    halt()
+            elif outcome == STATUS_SKIPPED:
+                if slots is not None:
+                    slots.release()  # already posted — the source queues the next story instead
+            else:
+                halt()  # ✅ Stop after first failed attempt
+
+    post_task = asyncio.create_task(poster())
+    results = await asyncio.gather(source(), *(generator() for _ in range(workers)), return_exceptions=True)
+    await to_post.put(_DONE)
+    await post_task
+    error = state["error"] or next((r for r in results if isinstance(r, Exception)), None)
+    if error is not None:
+        raise error
+    return state["posted"]
+
+
+# ------------------ news_batch ------------------
+async def _news(count: int) -> int:
+    db = _Db()
+    try:
+        await db.open()
+        lease = CONFIG["news"]["lease_seconds"]
+        max_age = CONFIG["drafts"]["max_age_hours"]
+
+        async def produce(to_generate, to_post, stop, slots):
+            queued = 0
+            while True:
+                await slots.acquire()
+                if stop.is_set():
+                    return
+                draft = await db(pop_ready_draft, db.con, max_age)
+                if draft:
+                    await to_post.put(("draft", draft))  # ready drafts skip the LLM stage
+                    queued += 1
+                    continue
+                item = await db(claim_next_pending, db.con, lease)
+                if not item:
+                    if queued == 0:
+                        log.warning("⛔ कोई नई खबर उपलब्ध नहीं — पहले cache_news चलाओ")
+                    return
+                if await db(_skip_if_covered, db.con, item):
+                    slots.release()
+                    continue
+                await to_generate.put(item)
+                queued += 1
+
+        def generate(item):
+            return "item", item, _tweet_for_item(item)
+
+        def post(con, job):
+            if job[0] == "draft":
+                return _post_draft(con, job[1])  # deferred → draft goes back to 'ready'
+            return _post_generated(con, job[1], job[2])
+
+        def unclaim(con, item):
+            release_item(con, item[0])
+
+        def keep(con, job):
+            if job[0] == "draft":
+                finish_draft(con, job[1][0], DRAFT_READY)
+            elif CONFIG["testing"]["test_mode"]:
+                release_item(con, job[1][0])  # TEST_MODE leaves the queue as it was
+            else:
+                _keep_as_draft(con, job[1], job[2])  # next run posts it without another LLM call
+
+        return await _pipeline(db, produce, generate, post, unclaim, keep, limit=count)
+    finally:
+        db.close()
+
+
+def run_news_pipeline(count: int) -> int:
+    """Post up to `count` news tweets through the pipeline; returns how many went out."""
+    log.info(f"🚀 Pipeline mode: {count} tweets, {CONFIG['pipeline']['generate_workers']} generate workers")
+    return asyncio.run(_news(count))
+
+
+# ------------------ trend_window ------------------
+async def _trends(topics: list) -> int:
+    db = _Db()
+    try:
+        await db.open()
+
+        async def produce(to_generate, to_post, stop, slots):
+            for topic in topics:
+                if stop.is_set():
+                    return
+                await to_generate.put(topic)
+
+        def generate(topic):
+            tweet, use_meme = _trend_tweet(topic)
+            media = make_meme(tweet) if use_meme else None  # rendered here, not on the posting thread
+            return topic, tweet, use_meme, media
+
+        def post(con, job):
+            topic, tweet, use_meme, media = job
+            return post_one_tweet(tweet, source="trend_hi", use_meme=use_meme, con=con, title=topic, media=media)
+
+        return await _pipeline(db, produce, generate, post)
+    finally:
+        db.close()
+
+
+def run_trend_pipeline(topics: list) -> int:
+    """Post one tweet per trend topic through the pipeline; returns how many went out."""
+    log.info(f"🚀 Pipeline mode: {len(topics)} trend topics")
+    posted = asyncio.run(_trends(topics))
+    log.info(f"✅ {posted}/{len(topics)} trend tweets posted")
+    return posted
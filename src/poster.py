@@ -1,59 +1,58 @@
 # src/poster.py
 
-import tweepy
-from .config import CONFIG
 from .utils import get_logger
+from . import ratelimit, x_clients
 
 log = get_logger()
 
 
 def _get_api_v1():
-    """Return Tweepy API v1.1 client (OAuth 1.0a User Context)."""
-    auth = tweepy.OAuth1UserHandler(
-        CONFIG["x"]["api_key"],
-        CONFIG["x"]["api_secret"],
-        CONFIG["x"]["access_token"],
-        CONFIG["x"]["access_secret"]
-    )
-    return tweepy.API(auth)
+    """Shared Tweepy API v1.1 client (OAuth 1.0a User Context), see x_clients."""
+    return x_clients.api_v1()
 
 
 def _get_api_v2():
-    """Return Tweepy API v2 client (OAuth 2.0 User Context)."""
-    return tweepy.Client(
-        consumer_key=CONFIG["x"]["api_key"],
-        consumer_secret=CONFIG["x"]["api_secret"],
-        access_token=CONFIG["x"]["access_token"],
-        access_token_secret=CONFIG["x"]["access_secret"]
-    )
+    """Shared Tweepy API v2 client (OAuth 1.0a User Context), see x_clients."""
+    return x_clients.client_v2()
 
 
 def post_text(text: str):
     """
     ✅ Text-only Tweet using API v2 (Free + Works on Essential Access).
+    Raises ratelimit.PostDeferred when X's limits or our posting budget say "not now".
     """
+    import tweepy
+    ratelimit.acquire(ratelimit.TWEET_V2)
     try:
         api = _get_api_v2()
         response = api.create_tweet(text=text)
         tweet_id = response.data.get("id")
         log.info(f"✅ Tweet posted → ID: {tweet_id}")
         return tweet_id
+    except tweepy.TooManyRequests as e:
+        raise ratelimit.deferred_from(e.response)
     except Exception as e:
         log.error(f"❌ Failed to post tweet: {e}")
         return None
 
 
-def post_text_with_media(text: str, image_path: str):
+def post_text_with_media(text: str, image_path: str, file=None):
     """
     ⚠ Media Tweet using API v1.1 — Requires Elevated Access.
     ✅ If USE_MEMES=false, this function is never used.
+    `file` = in-memory image (e.g. meme.make_meme_buffer); `image_path` then only names it.
+    Raises ratelimit.PostDeferred like post_text.
     """
+    import tweepy
+    ratelimit.acquire(ratelimit.MEDIA_UPLOAD, ratelimit.STATUS_UPDATE)
     try:
         api = _get_api_v1()
-        media = api.media_upload(image_path)
+        media = api.media_upload(image_path, file=file)
         res = api.update_status(status=text, media_ids=[media.media_id_string])
         log.info(f"✅ Tweet with image posted → ID: {res.id}")
         return res.id
+    except tweepy.TooManyRequests as e:
+        raise ratelimit.deferred_from(e.response)
     except tweepy.Forbidden:
         log.error(
             "❌ 403 Error: Your Twitter app doesn't allow media uploads.\n"
@@ -0,0 +1,186 @@
+"""
+Rate-limit-aware posting scheduler.
+
+Two things decide when the next post may go out:
+- X's own headers. Every response of the shared X clients (x_clients) passes
+  through `observe`, which stores x-rate-limit-limit/-remaining/-reset per
+  endpoint and the 24-hour user/app posting limits (x-user-limit-24hour-*,
+  x-app-limit-24hour-*).
+- A local token bucket fed by CONFIG["limits"]: POST_BURST tokens, refilled at
+  the daily cap per day — or slower, if what is left of the monthly cap has to
+  last until month end.
+
+`acquire` sleeps until the exact reset time when that is at most
+RATE_LIMIT_MAX_WAIT seconds away, otherwise raises PostDeferred so the caller
+keeps the story/draft for a later run instead of dropping it. State lives in
+SQLite (rate_limits): the daemon's jobs share it, and so do CI runs, because
+the workflow carries bot.sqlite3 over with actions/cache.
+"""
+import time
+import sqlite3
+import calendar
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlsplit
+
+from .config import CONFIG
+from .db import shared, quota_usage, rate_limit_all, rate_limit_put
+from .utils import get_logger
+
+log = get_logger()
+
+# Endpoint keys are "<METHOD> <path>", as recorded by observe()
+TWEET_V2 = "POST /2/tweets"
+STATUS_UPDATE = "POST /1.1/statuses/update.json"
+MEDIA_UPLOAD = "POST /1.1/media/upload.json"
+BUCKET = "bucket"
+_DAILY = {"user-24h": "x-user-limit-24hour", "app-24h": "x-app-limit-24hour"}
+_DEFAULT_WINDOW = 15 * 60  # X rate-limit windows are 15 minutes
+
+
+class PostDeferred(Exception):
+    """Posting is blocked until `until` (unix seconds); the caller keeps the item for later."""
+
+    def __init__(self, until: float, reason: str):
+        at = datetime.fromtimestamp(until, timezone.utc)
+        super().__init__(f"{reason} — deferred until {at:%Y-%m-%d %H:%M:%S} UTC")
+        self.until = until
+        self.reason = reason
+
+
+def _db():
+    return shared(CONFIG["db"]["path"], _account())  # observe() runs wherever requests runs
+
+
+def _account() -> str:
+    return CONFIG["x"]["account"]
+
+
+def _num(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def observe(response, *args, **kwargs):
+    """requests response hook (installed by x_clients): remember X's rate-limit headers."""
+    h = response.headers
+    now = time.time()
+    endpoint = f"{response.request.method} {urlsplit(response.request.url).path}"
+    rows = []
+    remaining = _num(h.get("x-rate-limit-remaining"))
+    if remaining is not None:
+        rows.append((endpoint, _num(h.get("x-rate-limit-limit")), remaining, _num(h.get("x-rate-limit-reset"))))
+    elif response.status_code == 429:
+        rows.append((endpoint, None, 0, now + _DEFAULT_WINDOW))
+    for key, prefix in _DAILY.items():
+        remaining = _num(h.get(f"{prefix}-remaining"))
+        if remaining is not None:
+            rows.append((key, _num(h.get(f"{prefix}-limit")), remaining, _num(h.get(f"{prefix}-reset"))))
+    if not rows:
+        return
+    try:
+        with _db() as con:
+            for key, lim, remaining, reset_at in rows:
+                rate_limit_put(con, _account(), key, lim, remaining, reset_at, now)
+    except sqlite3.Error as e:
+        log.warning(f"⚠ Rate-limit state not saved: {e}")
+
+
+def _refill_rate(con, now: float) -> float:
+    """Bucket tokens per second: the daily cap per day, capped by what's left of the month."""
+    limits = CONFIG["limits"]
+    dt = datetime.fromtimestamp(now, timezone.utc)
+    _, monthly = quota_usage(con, _account(), now=dt)
+    month_end = dt.replace(day=calendar.monthrange(dt.year, dt.month)[1], hour=0, minute=0, second=0,
+                           microsecond=0) + timedelta(days=1)
+    left = max(0, limits["monthly"] - monthly)
+    return min(limits["daily"] / 86400, left / max(1.0, (month_end - dt).total_seconds()))
+
+
+def _bucket(con, state: dict, now: float):
+    cap = CONFIG["limits"]["burst"]
+    rate = _refill_rate(con, now)
+    row = state.get(BUCKET)
+    if row is None:
+        return float(cap), rate
+    _, tokens, _, updated_at = row
+    return min(float(cap), tokens + rate * max(0.0, now - updated_at)), rate
+
+
+def _wait(state: dict, tokens: float, rate: float, keys, now: float):
+    """(seconds until a post may go out, reason) — 0 if it may go out now."""
+    wait, reason = 0.0, None
+    for key in keys:
+        row = state.get(key)
+        if not row:
+            continue
+        _, remaining, reset_at, _ = row
+        if remaining is not None and remaining <= 0 and reset_at and reset_at - now > wait:
+            wait, reason = reset_at - now, f"X limit exhausted ({key})"
+    if tokens < 1:
+        need = (1 - tokens) / rate if rate > 0 else 86400.0
+        if need > wait:
+            wait, reason = need, "posting budget used up (token bucket)"
+    return wait, reason
+
+
+def next_slot(*endpoints, now: float = None):
+    """(seconds until a post on `endpoints` may go out, reason or None)."""
+    now = now or time.time()
+    keys = (*(endpoints or (TWEET_V2,)), *_DAILY)
+    with _db() as con:
+        state = rate_limit_all(con, _account())
+        tokens, rate = _bucket(con, state, now)
+    return _wait(state, tokens, rate, keys, now)
+
+
+def acquire(*endpoints, max_wait: float = None):
+    """
+    Block until one post on `endpoints` is allowed and take a bucket token.
+    Waits up to RATE_LIMIT_MAX_WAIT seconds (to the exact reset time); beyond that → PostDeferred.
+    """
+    max_wait = CONFIG["limits"]["max_wait"] if max_wait is None else max_wait
+    wait, reason = next_slot(*endpoints)
+    if wait > max_wait:
+        raise PostDeferred(time.time() + wait, reason)
+    if wait > 0:
+        log.info(f"⏳ {reason} — {wait:.0f}s तक रुक रहे हैं")
+        time.sleep(wait)
+
+    now = time.time()
+    with _db() as con:
+        tokens, _ = _bucket(con, rate_limit_all(con, _account()), now)
+        rate_limit_put(con, _account(), BUCKET, CONFIG["limits"]["burst"], max(0.0, tokens - 1), None, now)
+
+
+def deferred_from(response) -> PostDeferred:
+    """PostDeferred for a 429 response (observe() has already stored its headers)."""
+    headers = getattr(response, "headers", None) or {}
+    reset_at = _num(headers.get("x-rate-limit-reset")) or time.time() + _DEFAULT_WINDOW
+    return PostDeferred(reset_at, "429 Too Many Requests from X")
+
+
+def headroom(*endpoints) -> dict:
+    """Current posting headroom: caps, token bucket, X's last-seen limits and the next free slot."""
+    now = time.time()
+    with _db() as con:
+        state = rate_limit_all(con, _account())
+        tokens, rate = _bucket(con, state, now)
+        daily, monthly = quota_usage(con, _account(), now=datetime.fromtimestamp(now, timezone.utc))
+    wait, reason = _wait(state, tokens, rate, (*(endpoints or (TWEET_V2,)), *_DAILY), now)
+    limits = CONFIG["limits"]
+    return {
+        "daily_left": max(0, limits["daily"] - daily),
+        "monthly_left": max(0, limits["monthly"] - monthly),
+        "bucket_tokens": round(tokens, 2),
+        "bucket_capacity": limits["burst"],
+        "refill_per_hour": round(rate * 3600, 3),
+        "x": {
+            key: {"limit": lim, "remaining": remaining,
+                  "reset_in": round(reset_at - now) if reset_at else None}
+            for key, (lim, remaining, reset_at, _) in state.items() if key != BUCKET
+        },
+        "next_post_in": round(wait),
+        "blocked_by": reason,
+    }
@@ -1,5 +1,26 @@
 import sys
-from .orchestrator import run_trend_window, run_news_post_batch, cache_news_batch
+import importlib
+
+from . import metrics
+
+# trigger → (module, function). Modules are imported only for the trigger that runs.
+# Heavy libraries (groq, tweepy, PIL, feedparser, requests) are imported inside the functions
+# that use them, so a CLI start stays fast (benchmarks/import_time.py checks this).
+TRIGGERS = {
+    "trend_window": ("src.orchestrator", "run_trend_window"),
+    "cache_news": ("src.orchestrator", "cache_news_batch"),
+    "prepare_drafts": ("src.orchestrator", "prepare_drafts"),
+    # news per run defaults to 1; can override via env NEWS_BATCH_COUNT if you want
+    "news_batch": ("src.orchestrator", "run_news_post_batch"),
+    "daemon": ("src.daemon", "run_daemon"),
+}
+
+
+def resolve(trigger: str):
+    """Import and return the entry point for `trigger` (used by benchmarks/import_time.py)."""
+    module, func = TRIGGERS[trigger]
+    return getattr(importlib.import_module(module), func)
+
 
 if __name__ == "__main__":
     trigger = None
@@ -8,18 +29,15 @@ if __name__ == "__main__":
             if arg.startswith("TRIGGER="):
                 trigger = arg.split("=")[1]
 
-    if trigger == "trend_window":
-        print("✅ Trigger: trend_window")
-        run_trend_window()
-    elif trigger == "cache_news":
-        print("✅ Trigger: cache_news")
-        cache_news_batch()
-    elif trigger == "news_batch":
-        print("✅ Trigger: news_batch")
-        # news per run defaults to 1; can override via env NEWS_BATCH_COUNT if you want
-        run_news_post_batch(count=1)
+    if trigger in TRIGGERS:
+        note = " (Ctrl+C / SIGTERM to stop)" if trigger == "daemon" else ""
+        print(f"✅ Trigger: {trigger}{note}")
+        if trigger == "daemon":
+            resolve(trigger)()  # every daemon job is its own metrics run
+        else:
+            with metrics.run(trigger):
+                resolve(trigger)()
     else:
         print("⚠️ No valid TRIGGER provided. Use:")
-        print("   python -m src.run TRIGGER=trend_window")
-        print("   python -m src.run TRIGGER=cache_news")
-        print("   python -m src.run TRIGGER=news_batch")
+        for name in TRIGGERS:
+            print(f"   python -m src.run TRIGGER={name}")
@@ -0,0 +1,175 @@
+"""
+Single-pass text-safety engine behind utils.is_sensitive / utils.detox.
+
+All keywords (built-in + SAFETY_KEYWORDS_FILE) are NFKC-normalized, casefolded
+and merged into ONE case-insensitive prefix-trie regex, compiled once per process. A text is
+scanned once; each hit is mapped back to its category with a dict lookup, so
+growing the lists to thousands of terms doesn't mean thousands of re.search calls.
+
+Keyword file (JSON): {"<category>": ["term", "multi word term", ...], "slurs": [...]}.
+Categories are merged with the built-ins; "slurs" feeds detox.
+"""
+import re
+import json
+import bisect
+import itertools
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set
+
+from .config import CONFIG
+
+SLURS = "slurs"
+DETOX_PLACEHOLDER = "〔हटाया गया〕"
+
+# Hindi + English; whole-word matches (same \b semantics as the old per-category regexes)
+KEYWORDS: Dict[str, List[str]] = {
+    "death": ["मौत", "मारा गया", "मारे गए", "दम तोड़", "शव", "अंतिम संस्कार"],
+    "accident": ["हादसा", "दुर्घटना", "ट्रेन", "बस", "टकरा", "रेल"],
+    "disaster": ["बाढ़", "भूकंप", "भूस्खलन", "तूफान", "cyclone", "flood", "earthquake"],
+    "health": ["ऑक्सीजन", "oxygen", "icu", "hospital", "अस्पताल"],
+    "violence": ["rape", "बलात्कार", "हत्या", "murder", "lynch", "लिंच"],
+    "fire": ["fire", "आग", "blast", "विस्फोट"],
+    "collapse": ["bridge", "पुल", "collapse", "गिर"],
+    "governance": ["negligence", "लापरवाही", "corruption", "भ्रष्टाचार"],
+    "conflict": ["war", "युद्ध", "दंगा", "riot"],
+    SLURS: ["बेवकूफ", "हरामी", "कमीना", "चुतिया", "भोसडीके", "asshole", "bastard", "idiot", "moron"],
+}
+
+
+def _norm(text: str) -> str:
+    return unicodedata.normalize("NFKC", text)
+
+
+def _term_key(term: str) -> str:
+    return " ".join(_norm(term).casefold().split())
+
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """Alternation of `terms` factored by common prefix: the regex engine walks one trie, not N branches."""
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node) -> str:
+        end = "" in node
+        alts = [(r"\s+" if ch == " " else re.escape(ch)) + build(child)
+                for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        if len(alts) == 1 and not end:
+            return alts[0]
+        body = alts[0] if len(alts) == 1 and len(alts[0]) == 1 else "(?:" + "|".join(alts) + ")"
+        return body + "?" if end else body
+
+    return build(trie)
+
+
+def _load_file(path: str) -> Dict[str, List[str]]:
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path}: expected an object of category → [terms]")
+    return {str(cat): [str(t) for t in terms] for cat, terms in data.items()}
+
+
+class _Matcher:
+    def __init__(self, keywords: Dict[str, List[str]]):
+        self.categories: Dict[str, Set[str]] = {}  # normalized term → categories
+        for cat, terms in keywords.items():
+            for term in terms:
+                key = _term_key(term)
+                if key:
+                    self.categories.setdefault(key, set()).add(cat)
+        self.pattern = (re.compile(r"\b" + _trie_regex(self.categories) + r"\b", re.IGNORECASE)
+                        if self.categories else None)
+
+    def hits(self, text: str):
+        """(match, categories) for every keyword occurrence in already-normalized `text`."""
+        if not self.pattern:
+            return
+        for m in self.pattern.finditer(text):
+            yield m, self._categories_of(m.group())
+
+    def _categories_of(self, matched: str) -> Set[str]:
+        cats = self.categories.get(_term_key(matched))
+        if cats is None:
+            # IGNORECASE matched a case variant that doesn't casefold back to the term (e.g. "FİRE", "rıot")
+            cats = set()
+            for key, c in self.categories.items():
+                if re.fullmatch(re.escape(key).replace(r"\ ", r"\s+"), matched, re.IGNORECASE):
+                    cats |= c
+        return cats
+
+
+def _split(keywords: Dict[str, List[str]]):
+    sensitive = {c: t for c, t in keywords.items() if c != SLURS}
+    return _Matcher(sensitive), _Matcher({SLURS: keywords.get(SLURS, [])})
+
+
+@lru_cache(maxsize=1)
+def _engine():
+    keywords = {cat: list(terms) for cat, terms in KEYWORDS.items()}
+    path = CONFIG["safety"]["keywords_file"]
+    if path:
+        for cat, terms in _load_file(path).items():
+            keywords.setdefault(cat, []).extend(terms)
+    return _split(keywords)
+
+
+def reload():
+    """Drop the compiled matcher (e.g. after editing the keyword file)."""
+    _engine.cache_clear()
+
+
+def sensitive_categories(text: str) -> Set[str]:
+    """Categories (death, accident, disaster, …) whose keywords appear in `text`."""
+    if not text:
+        return set()
+    found: Set[str] = set()
+    for _, cats in _engine()[0].hits(_norm(text)):
+        found |= cats
+    return found
+
+
+def is_sensitive(text: str) -> bool:
+    if not text:
+        return False
+    pattern = _engine()[0].pattern
+    return bool(pattern and pattern.search(_norm(text)))
+
+
+def detox(text: str) -> str:
+    """Replace slurs/abuse with a placeholder; text without hits is returned unchanged."""
+    if not text:
+        return text
+    pattern = _engine()[1].pattern
+    norm = _norm(text)
+    if not pattern or not pattern.search(norm):
+        return text
+    spans = _norm_spans(text)
+    if "".join(part for _, _, part in spans) != norm:
+        return pattern.sub(DETOX_PLACEHOLDER, norm)  # composition across clusters (rare): no span map
+    # matched on the normalized text, replaced in the original: the rest keeps its ligatures, ①, full-width …
+    starts = list(itertools.accumulate((len(part) for _, _, part in spans), initial=0))[:-1]
+    out, last = [], 0
+    for m in pattern.finditer(norm):
+        first = spans[bisect.bisect_right(starts, m.start()) - 1]
+        final = spans[bisect.bisect_right(starts, m.end() - 1) - 1]
+        out += [text[last:first[0]], DETOX_PLACEHOLDER]
+        last = final[1]
+    out.append(text[last:])
+    return "".join(out)
+
+
+def _norm_spans(text: str):
+    """(start, end, NFKC) per base character + its combining marks of `text`."""
+    spans, start = [], 0
+    for i in range(1, len(text) + 1):
+        if i == len(text) or not unicodedata.combining(text[i]):
+            spans.append((start, i, _norm(text[start:i])))
+            start = i
+    return spans
@@ -0,0 +1,88 @@
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .. import metrics
+from ..config import CONFIG
+from ..utils import get_logger, source_keys
+from .gnews import fetch_gnews
+from .newsapi import fetch_newsapi
+from .google_rss import fetch_google_rss
+from .x_trends import fetch_x_trends
+
+log = get_logger()
+
+
+# name → fetcher(timeout) returning [(title, desc, url), ...]
+SOURCES = {
+    "gnews": lambda timeout: fetch_gnews(CONFIG["news"]["gnews_limit"], timeout=timeout),
+    "newsapi": lambda timeout: fetch_newsapi(CONFIG["news"]["newsapi_limit"], timeout=timeout),
+    "google_rss": lambda timeout: fetch_google_rss(CONFIG["news"]["google_rss_limit"], timeout=timeout),
+    "x_trends": lambda timeout: fetch_x_trends(CONFIG["news"]["x_trends_limit"]),
+}
+
+
+def _enabled(name: str) -> bool:
+    news, x = CONFIG["news"], CONFIG["x"]
+    if name == "gnews":
+        return bool(news["gnews_key"])
+    if name == "newsapi":
+        return bool(news["newsapi_key"])
+    if name == "x_trends":
+        return all(x[k] for k in ("api_key", "api_secret", "access_token", "access_secret"))
+    return name in SOURCES
+
+
+def _timed(name: str, deadline: float):
+    t0 = time.perf_counter()
+    with metrics.span(name):
+        items = SOURCES[name](deadline)
+    return items, (time.perf_counter() - t0) * 1000
+
+
+def fetch_all(names=None, deadline: float = None):
+    """
+    Query all configured sources concurrently; wall time ≈ the slowest source, capped at `deadline`.
+    Returns (items, stats):
+      items = [(title, desc, url, source), ...] merged in source order, same URL/title only once
+      stats = {source: {"items": n, "ms": latency, "error": str | None}}
+    """
+    names = [n for n in (names or CONFIG["news"]["sources"]) if _enabled(n)]
+    deadline = deadline or CONFIG["news"]["fetch_deadline"]
+    stats = {}
+    results = {}
+    if not names:
+        return [], stats
+
+    ex = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="fetch")
+    # each worker runs in a copy of our context, so its span nests under the caller's
+    futures = {ex.submit(contextvars.copy_context().run, _timed, n, deadline): n for n in names}
+    done, _ = wait(futures, timeout=deadline)
+    ex.shutdown(wait=False, cancel_futures=True)
+
+    for fut, name in futures.items():
+        if fut not in done:
+            stats[name] = {"items": 0, "ms": deadline * 1000, "error": "deadline exceeded"}
+            continue
+        try:
+            items, ms = fut.result()
+            results[name] = items
+            stats[name] = {"items": len(items), "ms": round(ms, 1), "error": None}
+        except Exception as e:
+            stats[name] = {"items": 0, "ms": None, "error": str(e)}
+
+    merged, seen = [], set()
+    for name in names:
+        for title, desc, url in results.get(name, []):
+            keys = set(source_keys(title, url))
+            if not keys or keys & seen:
+                continue
+            seen |= keys
+            merged.append((title, desc, url, name))
+
+    for name, st in stats.items():
+        if st["error"]:
+            log.warning(f"⚠ {name}: {st['error']}")
+        else:
+            log.info(f"📥 {name}: {st['items']} items in {st['ms']:.0f} ms")
+    return merged, stats
@@ -1,13 +1,11 @@
-import requests
 from ..config import CONFIG
+from ..http_cache import get_json
 
-def fetch_gnews(n=20, country=None):
+def fetch_gnews(n=20, country=None, timeout=20):
     key = CONFIG["news"]["gnews_key"]
     country = country or CONFIG["news"]["country"]
     url = f"https://gnews.io/api/v4/top-headlines?country={country}&max={n}&apikey={key}&lang=en"
-    r = requests.get(url, timeout=20)
-    r.raise_for_status()
-    data = r.json()
+    data = get_json(url, "gnews", timeout=timeout)
     articles = []
     for a in data.get("articles", []):
         title = a.get("title") or ""
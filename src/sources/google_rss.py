@@ -0,0 +1,15 @@
+from ..config import CONFIG
+from ..http_cache import get
+
+def fetch_google_rss(n=20, url=None, timeout=20):
+    import feedparser
+    url = url or CONFIG["news"]["google_rss_url"]
+    # fetch with our own timeout (+ cache/ETag) — feedparser.parse(url) can hang forever
+    feed = feedparser.parse(get(url, "google_rss", timeout=timeout))
+    items = []
+    for e in feed.entries:
+        title = e.get("title") or ""
+        link = e.get("link") or ""
+        if title:
+            items.append((title, "", link))
+    return items[:n]
@@ -1,15 +1,13 @@
-import requests
 from ..config import CONFIG
+from ..http_cache import get_json
 
-def fetch_newsapi(n=20, country=None):
+def fetch_newsapi(n=20, country=None, timeout=20):
     key = CONFIG["news"]["newsapi_key"]
     if not key:
         return []
     country = country or CONFIG["news"]["country"]
     url = f"https://newsapi.org/v2/top-headlines?country={country}&pageSize={n}&apiKey={key}"
-    r = requests.get(url, timeout=20)
-    r.raise_for_status()
-    j = r.json()
+    j = get_json(url, "newsapi", timeout=timeout)
     arts = []
     for a in j.get("articles", []):
         arts.append((a.get("title",""), a.get("description",""), a.get("url","")))
@@ -1,14 +1,8 @@
-import tweepy
 from ..config import CONFIG
+from .. import x_clients
 
 def get_trends():
-    auth = tweepy.OAuth1UserHandler(
-        CONFIG["x"]["api_key"],
-        CONFIG["x"]["api_secret"],
-        CONFIG["x"]["access_token"],
-        CONFIG["x"]["access_secret"]
-    )
-    api = tweepy.API(auth)
+    api = x_clients.api_v1()  # shared with poster.py
     woeid = int(CONFIG["x"]["woeid"])
     trends = api.get_place_trends(id=woeid)  # list with [0]["trends"]
     return trends
@@ -28,3 +22,7 @@ def select_topics(trends_json, limit=2):
             continue
         out.append(name)
     return out
+
+def fetch_x_trends(n=5):
+    """Trend names as (title, desc, url) items, same shape as the news sources."""
+    return [(name, "", "") for name in select_topics(get_trends(), limit=n)]
@@ -1,23 +1,69 @@
 import re
+import json
+import queue
+import atexit
 import logging
+import logging.handlers
 import hashlib
 import textwrap
 import unicodedata
 from typing import List
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
 
 _LOGGER = None
+_LISTENER = None
+
+# LogRecord attributes that are not user fields (everything else passed via extra= goes into the JSON line)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, msg + any extra={...} fields (event, chars, …)."""
+
+    def format(self, record):
+        out = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "msg": record.getMessage(),
+        }
+        out.update({k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+def _handlers(cfg):
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter("%(asctime)s | %(levelname)s | %(message)s"))
+    handlers = [console]
+    if cfg["file"]:
+        rotating = logging.handlers.RotatingFileHandler(
+            cfg["file"], maxBytes=cfg["max_bytes"], backupCount=cfg["backups"], encoding="utf-8"
+        )
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+    return handlers
+
 
 def get_logger():
-    global _LOGGER
+    """
+    Bot logger. Callers only enqueue records (QueueHandler); a QueueListener thread does the
+    console + JSON-lines file I/O (LOG_FILE, rotated at LOG_MAX_BYTES), so logging never blocks a job.
+    """
+    global _LOGGER, _LISTENER
     if _LOGGER:
         return _LOGGER
+    from .config import CONFIG
+    cfg = CONFIG["logging"]
     logger = logging.getLogger("x-funny-news-bot")
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
-        handler.setFormatter(fmt)
-        logger.addHandler(handler)
-    logger.setLevel(logging.INFO)
+        q = queue.SimpleQueue()
+        logger.addHandler(logging.handlers.QueueHandler(q))
+        _LISTENER = logging.handlers.QueueListener(q, *_handlers(cfg), respect_handler_level=True)
+        _LISTENER.start()
+        atexit.register(_LISTENER.stop)  # drains the queue before the interpreter exits
+    logger.setLevel(cfg["level"])
+    logger.propagate = False
     _LOGGER = logger
     return logger
 
@@ -25,6 +71,70 @@ def mkhash(*parts: str) -> str:
     h = hashlib.sha1("||".join([p or "" for p in parts]).encode("utf-8")).hexdigest()
     return h
 
+# --- Canonical source keys (dedupe BEFORE any LLM call) ---
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "ocid", "cmpid", "ref", "src", "smid", "at_")
+
+def normalize_url(url: str) -> str:
+    """Lowercase host, drop www./fragment/tracking params/trailing slash, sort the query."""
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("m.") or host.startswith("amp."):
+        host = host.split(".", 1)[1]
+    path = parts.path.rstrip("/")
+    if path.endswith("/amp"):
+        path = path[:-4]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit(("", host, path, urlencode(query), ""))
+
+# A publisher suffix looks like "Times of India", "NDTV", "News18", "Moneycontrol.com":
+# 1–4 capitalized words (connectors allowed) — not "2nd ODI live score"
+_PUBLISHER_WORD = re.compile(r"^[A-Z][A-Za-z0-9.&'’]*$")
+_PUBLISHER_JOIN = {"of", "the", "and", "&", "on"}
+
+
+def _is_publisher(tail: str) -> bool:
+    words = tail.split()
+    return 0 < len(words) <= 4 and bool(_PUBLISHER_WORD.match(words[0])) and all(
+        _PUBLISHER_WORD.match(w) or w in _PUBLISHER_JOIN for w in words)
+
+
+def normalize_title(title: str) -> str:
+    """NFKC + casefold, drop a trailing ' - Publisher' suffix and punctuation."""
+    if not title:
+        return ""
+    t = unicodedata.normalize("NFKC", title)
+    # Google News / GNews append the outlet: "Headline - Times of India"
+    for sep in (" - ", " | ", " – ", " — "):
+        head, found, tail = t.rpartition(sep)
+        if found and head.strip() and _is_publisher(tail):
+            t = head
+            break
+    t = re.sub(r"[^0-9a-z\u0900-\u097F]+", " ", t.casefold())
+    return " ".join(t.split())
+
+def source_keys(title: str = None, url: str = None, item_hash: str = None) -> List[str]:
+    """Dedupe keys derived from the story itself, not from LLM output."""
+    keys = []
+    u = normalize_url(url)
+    if u:
+        keys.append("u:" + mkhash(u))
+    t = normalize_title(title)
+    if t:
+        keys.append("t:" + mkhash(t))
+    if item_hash:
+        keys.append("i:" + item_hash)
+    return keys
+
 def clean_topic(s: str) -> str:
     if not s:
         return ""
@@ -36,39 +146,8 @@ def clean_topic(s: str) -> str:
 def wrap_for_meme(text: str, width: int = 22) -> str:
     return textwrap.fill(text or "", width=width)
 
-# --- Detox: replace common slurs/abuse with placeholder ---
-_SLURS = [
-    r"\bबेवकूफ\b", r"\bहरामी\b", r"\bकमीना\b", r"\bचुतिया\b", r"\bभोसडीके\b",
-    r"\basshole\b", r"\bbastard\b", r"\bidiot\b", r"\bmoron\b"
-]
-def detox(text: str) -> str:
-    if not text:
-        return text
-    out = text
-    for pat in _SLURS:
-        out = re.sub(pat, "〔हटाया गया〕", out, flags=re.IGNORECASE)
-    return out
-
-# --- Sensitivity detection (Hindi + English keywords) ---
-_SENSITIVE_PATTERNS = [
-    r"\bमौत\b|\bमारा गया\b|\bमारे गए\b|\bदम तोड़\b|\bशव\b|\bअंतिम\sसंस्कार\b",
-    r"\bहादसा\b|\bदुर्घटना\b|\bट्रेन\b|\bबस\b|\bटकरा\b|\bरेल\b",
-    r"\bबाढ़\b|\bबाढ़\b|\bभूकंप\b|\bभूस्खलन\b|\bतूफान\b|\bcyclone\b|\bflood\b|\bearthquake\b",
-    r"\bऑक्सीजन\b|\boxygen\b|\bICU\b|\bhospital\b|\bअस्पताल\b",
-    r"\brape\b|\bबलात्कार\b|\bहत्या\b|\bmurder\b|\blynch\b|\bलिंच\b",
-    r"\bfire\b|\bआग\b|\bblast\b|\bविस्फोट\b",
-    r"\bbridge\b|\bपुल\b|\bcollapse\b|\bगिर\b",
-    r"\bnegligence\b|\bलापरवाही\b|\bcorruption\b|\bभ्रष्टाचार\b",
-    r"\bwar\b|\bयुद्ध\b|\bदंगा\b|\briot\b",
-]
-def is_sensitive(text: str) -> bool:
-    if not text:
-        return False
-    t = unicodedata.normalize("NFKC", text)
-    for pat in _SENSITIVE_PATTERNS:
-        if re.search(pat, t, flags=re.IGNORECASE):
-            return True
-    return False
+# --- Detox + sensitivity detection: one compiled matcher, keyword lists live in safety.py ---
+from .safety import detox, is_sensitive, sensitive_categories  # noqa: E402,F401
 
 # --- Hashtags in Hindi (no English spam) ---
 _HINDI_STOP = set([
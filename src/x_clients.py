@@ -0,0 +1,89 @@
+"""
+Shared X (Twitter) API clients.
+
+tweepy.API (v1.1: media upload, update_status, trends) and tweepy.Client
+(v2: create_tweet) each own a requests.Session. Building them once per process
+and handing the same objects to poster.py and sources/x_trends.py keeps the TLS
+connection to api.twitter.com / upload.twitter.com alive between calls — the
+daemon and multi-tweet runs skip the handshake after the first request.
+
+tweepy.API.request() ends with `finally: self.session.close()`, which would
+drop the v1.1 pool after every call, so the shared v1.1 session ignores
+close(); reset() is what really closes it.
+"""
+import threading
+
+from .config import CONFIG
+
+_CLIENTS = {}
+_LOCK = threading.Lock()
+
+
+def _credentials():
+    x = CONFIG["x"]
+    return x["api_key"], x["api_secret"], x["access_token"], x["access_secret"]
+
+
+def _tune(session):
+    """Keep-alive pool sized for our few hosts; every response feeds the rate-limit scheduler."""
+    from requests.adapters import HTTPAdapter
+    from . import ratelimit
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.hooks["response"].append(ratelimit.observe)
+    return session
+
+
+def _close(session):
+    for adapter in session.adapters.values():
+        adapter.close()
+
+
+def _build(kind: str, creds):
+    import tweepy
+    api_key, api_secret, access_token, access_secret = creds
+    if kind == "v1":
+        client = tweepy.API(tweepy.OAuth1UserHandler(api_key, api_secret, access_token, access_secret))
+        client.session.close = lambda: None  # called by tweepy after every v1.1 request
+    elif kind == "v2":
+        client = tweepy.Client(
+            consumer_key=api_key,
+            consumer_secret=api_secret,
+            access_token=access_token,
+            access_token_secret=access_secret,
+        )
+    else:
+        raise ValueError(f"unknown X client kind: {kind}")
+    _tune(client.session)
+    return client
+
+
+def get(kind: str):
+    """Process-wide client of `kind` ("v1" or "v2"); rebuilt only if the credentials change."""
+    creds = _credentials()
+    key = (kind, creds)
+    client = _CLIENTS.get(key)
+    if client is None:
+        with _LOCK:
+            client = _CLIENTS.get(key)
+            if client is None:
+                client = _CLIENTS[key] = _build(kind, creds)
+    return client
+
+
+def api_v1():
+    """tweepy.API (OAuth 1.0a User Context) — media upload, update_status, trends."""
+    return get("v1")
+
+
+def client_v2():
+    """tweepy.Client (OAuth 1.0a User Context) — create_tweet."""
+    return get("v2")
+
+
+def reset():
+    """Close every pooled session (tests, credential rotation)."""
+    with _LOCK:
+        for client in _CLIENTS.values():
+            _close(client.session)
+        _CLIENTS.clear()